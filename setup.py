@@ -31,6 +31,15 @@ setup(
             ]
     },
     install_requires=required,
+    extras_require={
+        "arrow": ["pyarrow"],
+        "regex": ["regex"],
+    },
+    entry_points={
+        "console_scripts": [
+            "texttidy=texttidy.cli:main"
+            ]
+    },
     tests_require=['pytest', 'pytest-cov', 'coveralls'],
     python_requires='>=3.7',
 )
\ No newline at end of file
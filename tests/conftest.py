@@ -0,0 +1,12 @@
+import pytest
+
+from texttidy import backend
+
+
+@pytest.fixture(autouse=True, params=backend.available_backends())
+def regex_backend(request):
+    """ Run every test with each installed regex backend. """
+    previous = backend.current_backend()
+    backend.set_backend(request.param)
+    yield request.param
+    backend.set_backend(previous)
@@ -0,0 +1,28 @@
+""" Custom steps registered for the registry tests """
+
+from functools import wraps
+
+import texttidy
+
+
+def exclaim(func):
+    @wraps(func)
+    def wrapper(text, *args, **kwargs):
+        return func(text, *args, **kwargs) + "!"
+    return wrapper
+
+
+@texttidy.register_step(name="shout")
+def shout(text, suffix="!"):
+    return text.upper() + suffix
+
+
+@texttidy.register_step(name="whisper")
+def lower_case(text):
+    return text.lower()
+
+
+@texttidy.register_step(name="shout2")
+@exclaim
+def shout2(text):
+    return text.upper()
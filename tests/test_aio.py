@@ -0,0 +1,62 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import texttidy
+from texttidy import Pipeline
+from texttidy.aio import AsyncPipeline
+
+
+tests = [
+    " Some bad  sentence.And bad stop",
+    " some other   - text 100,000. e.g. 1,00. they've"
+] * 20
+
+expected = [
+    "Some bad sentence. And bad stop.",
+    "some other text 100000. eg 100. they have."
+] * 20
+
+
+async def agen(texts):
+    for t in texts:
+        await asyncio.sleep(0)
+        yield t
+
+
+def test_arun():
+    pipe = Pipeline(pipe=texttidy.FULLMONTY)
+
+    async def main():
+        with ThreadPoolExecutor(2) as executor:
+            return await asyncio.gather(*[pipe.arun(t, executor) for t in tests[:4]])
+
+    assert asyncio.run(main())==expected[:4]
+
+
+def test_atransform():
+    pipe = Pipeline(pipe=texttidy.FULLMONTY)
+
+    async def main(texts, executor):
+        return [t async for t in pipe.atransform(texts, executor, batch_size=3, max_concurrency=2)]
+
+    assert asyncio.run(main(tests, None))==expected
+    assert asyncio.run(main(agen(tests), None))==expected
+
+    with ProcessPoolExecutor(2) as executor:
+        assert asyncio.run(main(tests, executor))==expected
+
+
+def test_async_pipeline():
+    pipe = AsyncPipeline(Pipeline(pipe=texttidy.FULLMONTY), batch_size=16, max_delay=0.01)
+
+    async def main():
+        return await asyncio.gather(*[pipe(t) for t in tests])
+
+    assert asyncio.run(main())==expected
+    # 40 concurrent calls are run as a few batches
+    assert pipe.batches<=4
+
+    async def transform():
+        return [t async for t in pipe.transform(agen(tests))]
+
+    assert asyncio.run(transform())==expected
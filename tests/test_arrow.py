@@ -0,0 +1,50 @@
+import pytest
+
+import texttidy
+from texttidy import Pipeline
+
+pa = pytest.importorskip("pyarrow")
+
+
+TESTS = [
+    " Some bad  sentence.And bad stop",
+    " some other   - text 100,000. e.g. 1,00. they've",
+    "COVID-19 ● one-to-one E.G. i. e. x-ray ,, hello . . world!!",
+    "“quoted” ‘single’ tab\there　wide space - - end;",
+    None,
+]
+
+
+def test_arrow_functions():
+    arr = pa.array(TESTS)
+    texts = TESTS[:-1]
+
+    for name in ['single_space', 'space_sentencestops', 'remove_numerical_commas', 'remove_dashes', 'remove_bullets',
+                 'remove_escapes', 'clean_quote_chars', 'replace_latin_abbrevs', 'remove_punctuation',
+                 'remove_duplicate_sentencestops', 'add_fullstop', 'replace_contractions', 'remove_pronouns']:
+        f = getattr(texttidy, name)
+        output = f(arr)
+        assert isinstance(output, pa.Array)
+        assert output.to_pylist()==f(texts) + [None], name
+
+    # Arguments without a kernel fall back to Python
+    assert texttidy.space_sentencestops(arr, stop_chars="-").to_pylist()==texttidy.space_sentencestops(texts, stop_chars="-") + [None]
+    assert texttidy.strip_stopwords(arr, ['some']).to_pylist()==texttidy.strip_stopwords(texts, ['some']) + [None]
+
+    chunked = pa.chunked_array([TESTS[:2], TESTS[2:]], type=pa.large_string())
+    output = texttidy.remove_dashes(chunked)
+    assert output.type==pa.large_string()
+    assert output.to_pylist()==texttidy.remove_dashes(texts) + [None]
+
+    with pytest.raises(IndexError):
+        texttidy.add_fullstop(pa.array(["ok", " ;"]))
+
+
+def test_arrow_pipeline():
+    arr = pa.array(TESTS)
+    pipe = Pipeline(pipe=texttidy.FULLMONTY)
+    assert pipe(arr).to_pylist()==pipe(TESTS[:-1]) + [None]
+
+    pipe = Pipeline(arr, texttidy.FULLMONTY)
+    pipe.run()
+    assert pipe.text_output.to_pylist()==Pipeline(pipe=texttidy.FULLMONTY)(TESTS[:-1]) + [None]
@@ -0,0 +1,61 @@
+import pickle
+
+import pytest
+
+import texttidy
+from texttidy import backend, benchmark
+from texttidy.pipe import Pipeline
+
+
+def test_use_backend():
+    default = backend.current_backend()
+    for name in backend.available_backends():
+        with texttidy.use_backend(name):
+            assert backend.current_backend()==name
+            assert backend.module().__name__==backend.BACKENDS[name]
+            assert texttidy.single_space(" hello   world ")=="hello world"
+        assert backend.current_backend()==default
+
+    with texttidy.use_backend(None):
+        assert backend.current_backend()==default
+
+    with pytest.raises(ValueError):
+        texttidy.set_backend("missing")
+    with pytest.raises(ValueError):
+        with texttidy.use_backend("missing"):
+            pass
+
+
+def test_pipeline_backend():
+    pytest.importorskip("regex")
+    text = "Hello - world...Don't you think,e.g. COVID-19 costs 1,000,000?"
+    expected = Pipeline(pipe=texttidy.FULLMONTY)(text)
+
+    pipe = Pipeline(pipe=texttidy.FULLMONTY, regex_backend="regex")
+    # The engines only disagree on edge cases, e.g. re matches the dotless ı for the pronoun i
+    pronouns = {1: {"step": "remove_pronouns"}}
+    with texttidy.use_backend("re"):
+        assert Pipeline(pipe=pronouns)("ı went")=="went"
+        assert Pipeline(pipe=pronouns, regex_backend="regex")("ı went")=="ı went"
+
+    assert pipe(text)==expected
+    assert pipe([text])==[expected]
+    assert pipe.transform_batch([text])==[expected]
+
+    clean = pickle.loads(pickle.dumps(pipe.compile()))
+    assert clean.regex_backend=="regex"
+    assert clean(text)==expected
+    assert pickle.loads(pickle.dumps(pipe)).regex_backend=="regex"
+
+    with pytest.raises(ValueError):
+        Pipeline(pipe=texttidy.FULLMONTY, regex_backend="missing")
+
+
+def test_benchmark_backends():
+    backends = backend.available_backends()
+    results = benchmark.run_benchmarks(corpora=["tweets"], functions=["single_space"], pipelines={}, repeat=1, scale=0.01, imports=False, backends=backends)
+    assert set(results["results"])=={f"single_space@{b}/tweets" for b in backends}
+
+    rows = benchmark.compare_backends(results)
+    assert [r["benchmark"] for r in rows]==["single_space/tweets"]
+    assert rows[0]["fastest"] in backends
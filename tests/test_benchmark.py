@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from texttidy import benchmark
+
+
+def test_generate_corpus():
+    for name in benchmark.CORPORA:
+        corpus = benchmark.generate_corpus(name, scale=0.01)
+        assert corpus==benchmark.generate_corpus(name, scale=0.01)
+        assert all(isinstance(t, str) and t for t in corpus)
+
+    assert benchmark.generate_corpus("tweets", seed=1, scale=0.01)!=benchmark.generate_corpus("tweets", scale=0.01)
+
+    with pytest.raises(ValueError):
+        benchmark.generate_corpus("missing")
+
+
+def test_run_benchmarks(tmp_path):
+    results = benchmark.run_benchmarks(corpora=["tweets", "unicode"], repeat=1, scale=0.01)
+    json.dumps(results)
+
+    names = set(benchmark.public_functions()) | {"FULLMONTY"}
+    assert set(results["results"])=={f"{n}/{c}" for n in names for c in ["tweets", "unicode"]} | {"import/texttidy"}
+
+    slower = json.loads(json.dumps(results))
+    for r in slower["results"].values():
+        r["best"] *= 10
+    rows = benchmark.compare(slower, results)
+    assert rows and all(r["regression"] for r in rows)
+    assert not any(r["regression"] for r in benchmark.compare(results, slower))
+
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(slower))
+    args = ["--corpora", "tweets", "--functions", "single_space", "--repeat", "1", "--scale", "0.01"]
+    assert benchmark.main(args + ["--compare", str(baseline)])==0
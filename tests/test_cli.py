@@ -0,0 +1,98 @@
+import csv
+import json
+
+import pytest
+
+import texttidy
+from texttidy import cli
+
+
+tests = [
+    " Some bad  sentence.And bad stop",
+    "",
+    " some other   - text 100,000. e.g. 1,00. they've"
+]
+
+expected = [
+    "Some bad sentence. And bad stop.",
+    "",
+    "some other text 100000. eg 100. they have."
+]
+
+
+def test_cli_text(tmp_path, capsys):
+    src = tmp_path / "input.txt"
+    dst = tmp_path / "output.txt"
+    src.write_text("\n".join(tests) + "\n", encoding="utf-8")
+
+    cli.main([str(src), "-o", str(dst)])
+    assert dst.read_text(encoding="utf-8").splitlines()==expected
+    assert "3 records" in capsys.readouterr().err
+
+
+def test_cli_jsonl(tmp_path):
+    src = tmp_path / "input.jsonl"
+    dst = tmp_path / "output.jsonl"
+    with open(src, "w", encoding="utf-8") as f:
+        for i, t in enumerate(tests):
+            f.write(json.dumps({"id": i, "body": t}) + "\n")
+        f.write(json.dumps({"id": 3}) + "\n")
+
+    pipeline = tmp_path / "pipeline.json"
+    pipeline.write_text(json.dumps(texttidy.FULLMONTY))
+
+    cli.main([str(src), "-o", str(dst), "--field", "body", "-p", str(pipeline), "-q"])
+    with open(dst, encoding="utf-8") as f:
+        output = [json.loads(line) for line in f]
+    assert [r.get("body") for r in output]==expected + [None]
+    assert [r["id"] for r in output]==[0, 1, 2, 3]
+
+
+def test_cli_csv(tmp_path):
+    src = tmp_path / "input.csv"
+    dst = tmp_path / "output.csv"
+    with open(src, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "review"])
+        for i, t in enumerate(tests):
+            writer.writerow([i, t])
+
+    cli.main([str(src), "-o", str(dst), "--column", "review", "-q"])
+    with open(dst, encoding="utf-8", newline="") as f:
+        output = list(csv.DictReader(f))
+    assert [r["review"] for r in output]==expected
+
+    with pytest.raises(ValueError):
+        cli.main([str(src), "-o", str(dst), "--column", "missing", "-q"])
+
+
+def test_cli_jsonl_non_objects(tmp_path):
+    src = tmp_path / "input.jsonl"
+    dst = tmp_path / "output.jsonl"
+    lines = [json.dumps({"text": tests[0]}), "[1, 2]", '"text"', "null", json.dumps({"text": tests[2]})]
+    src.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    cli.main([str(src), "-o", str(dst), "-q"])
+    with open(dst, encoding="utf-8") as f:
+        output = [json.loads(line) for line in f]
+    assert output==[{"text": expected[0]}, [1, 2], "text", None, {"text": expected[2]}]
+
+
+def test_clean_stream_skipped():
+    written = []
+
+    def records():
+        yield 0, tests[0]
+        for i in range(1, 5000):
+            # skipped records are written within the lookahead of run_parallel, not held until the end
+            assert len(written) > i - 1100
+            yield i, ""
+        yield 5000, tests[2]
+
+    n_records, n_chars = cli.clean_stream(records(), lambda record, text: written.append((record, text)), texttidy.FULLMONTY)
+    assert n_records==5001
+    assert n_chars==len(tests[0]) + len(tests[2])
+    assert [r for r, _ in written]==list(range(5001))
+    assert written[0][1]==expected[0]
+    assert written[-1][1]==expected[2]
+    assert all(t=="" for _, t in written[1:-1])
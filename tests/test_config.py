@@ -0,0 +1,28 @@
+import subprocess
+import sys
+
+import texttidy
+from texttidy import config
+
+
+def test_lazy_data():
+    script = "\n".join([
+        "import sys",
+        "import texttidy",
+        "from texttidy import config",
+        "assert 'tqdm' not in sys.modules",
+        "assert not set(config.LAZY_DATA) & set(vars(config))",
+        "assert texttidy.PRONOUNS",
+        "assert 'PRONOUNS' in vars(config)",
+        "assert 'CONTRACTIONS' not in vars(config)",
+    ])
+    subprocess.run([sys.executable, "-c", script], check=True)
+
+
+def test_data():
+    assert texttidy.CONTRACTIONS["don't"]=="do not"
+    assert "i'll" in texttidy.CONTRACTIONS_EXCEPTIONS
+    assert "he" in texttidy.PRONOUNS
+    assert texttidy.FULLMONTY["0"]["step"]=="replace_latin_abbrevs"
+    assert texttidy.CONTRACTIONS is config.CONTRACTIONS
+    assert "FULLMONTY" in dir(config)
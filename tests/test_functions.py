@@ -1,3 +1,4 @@
+import itertools
 import re
 import pytest
 
@@ -121,7 +122,10 @@ def test_replace_contractions():
         ("who'd be", "who would be"),
         ("wouldn't've", "would not have"),
         ("dont be silly", "do not be silly"),
-        ("I'll not replace well nor ill", "I will not replace well nor ill")
+        ("I'll not replace well nor ill", "I will not replace well nor ill"),
+        ("DON'T stop, Dont stop", "do not stop, do not stop"),
+        ("gonna\twanna\n", "going to\twant to\n"),
+        ("", "")
         ]
     f = texttidy.replace_contractions
     run_test(f, tests)
@@ -187,6 +191,31 @@ def test_replace_tokens():
     run_test(f, tests, vals)
     run_list_test(f, tests, vals)
 
+    replacer = texttidy.TokenReplacer(vals)
+    run_test(f, tests, replacer)
+    run_list_test(f, tests, replacer)
+    assert len(replacer) == 4
+
+    # Longest synonym wins, synonyms are matched literally
+    vals = {
+        "NYC": ["new york", "new york city"],
+        "US": ["u.s.a", "usa"],
+        "state": ["new"]
+    }
+    tests = [
+        ('New York City is in the U.S.A and new-york is NEW', 'NYC is in the US and new-york is state'),
+        ('uxsxa usa.', 'uxsxa US.')
+    ]
+    run_test(f, tests, texttidy.TokenReplacer(vals))
+
+    # Tokens that change length when lowered still match
+    tests = [
+        ('İstanbul is big', 'X is big'),
+        ('istanbul and İstanbul', 'X and X'),
+    ]
+    run_test(f, tests, {'X': ['İstanbul']})
+    run_test(f, [('İstanbul is big', 'X is big')], {'X': ['istanbul']})
+
 
 def test_strip_stopwords():
 
@@ -228,6 +257,20 @@ def test_strip_stopwords():
     options = {"from_start": True, "from_end": True, "remove_numeric_tokens": True, "trim_punc": True}
     run_test(f, tests, stopwords, **options)
     run_list_test(f, tests, stopwords, **options)
+    run_test(f, tests, frozenset(stopwords), **options)
+
+    # The numeric token at the end is removed, not its first occurrence
+    tests = [
+        ("2nd to 2nd", ""),
+        ("a 2nd b 2nd", "a 2nd b"),
+        ("(Hello) world", "(Hello) world")
+        ]
+    options = {"from_start": False, "from_end": True, "remove_numeric_tokens": True, "trim_punc": False}
+    run_test(f, tests, stopwords, **options)
+
+    # Long runs of stopwords do not recurse
+    long_text = "to you " * 5000 + "hello world" + " !" * 5000
+    assert f(long_text, stopwords) == "hello world"
 
 
 def test_remove_duplicate_sentencestops():
@@ -243,3 +286,125 @@ def test_remove_duplicate_sentencestops():
     f = texttidy.remove_duplicate_sentencestops
     run_test(f, tests)
     run_list_test(f, tests)
+
+
+def test_pattern_caches():
+    from texttidy.functions import pattern_cache_info
+
+    f = texttidy.space_sentencestops
+    tests = [
+        ('Bad stop.Good stop ;here', 'Bad stop. Good stop; here'),
+        ('hello&world', 'hello& world'),
+        ('a - b', 'a - b'),
+    ]
+    before = pattern_cache_info()['sentencestop_spacer']
+    run_test(f, tests, stop_chars='.;&')
+    run_test(f, tests, stop_chars='.;&')
+    after = pattern_cache_info()['sentencestop_spacer']
+    assert after.misses - before.misses <= 1
+    assert after.hits - before.hits >= 3
+
+    # Characters that are not literal in a pattern are replaced one at a time, as before
+    run_test(f, [('Stop^Go ^', 'Stop^ Go^')], stop_chars='.^')
+
+    tests = [
+        ('hello world.. . ?? ..', 'hello world. ? .'),
+        ('hello ;;; ; world', 'hello ; world'),
+        ('hello.  . world', 'hello.  . world'),
+    ]
+    run_test(texttidy.remove_duplicate_sentencestops, tests)
+    run_test(texttidy.remove_pronouns, [('he said I did', 'said did')], pronouns=['he', 'i'])
+    assert pattern_cache_info()['pronoun_pattern'].currsize >= 1
+
+
+def test_vectorize():
+    tests = [
+        ('hello  world', 'hello world'),
+        (' hello world ', 'hello world')
+    ]
+    test = [i[0] for i in tests]
+    expected = [i[1] for i in tests]
+    f = texttidy.single_space
+
+    assert f(tuple(test)) == tuple(expected)
+
+    output = f(i for i in test)
+    assert not isinstance(output, list)
+    assert list(output) == expected
+
+
+def test_streaming():
+    consumed = []
+
+    def texts():
+        for i in itertools.count():
+            consumed.append(i)
+            yield f"Text  {i}, don't stop... e.g. COVID-19 – 1,000 ●"
+
+    # Chaining every function over an endless generator pulls one text at a time through all of them
+    steps = [
+        (texttidy.replace_contractions,), (texttidy.clean_quote_chars,), (texttidy.remove_bullets,),
+        (texttidy.remove_escapes,), (texttidy.remove_dashes,), (texttidy.remove_numerical_commas,),
+        (texttidy.replace_latin_abbrevs,), (texttidy.remove_duplicate_sentencestops,), (texttidy.space_sentencestops,),
+        (texttidy.remove_pronouns,), (texttidy.remove_punctuation,), (texttidy.replace_tokens, {'word': ['text']}),
+        (texttidy.strip_stopwords, ['the']), (texttidy.single_space,), (texttidy.add_fullstop,),
+    ]
+    output = texts()
+    for f, *args in steps:
+        output = f(output, *args)
+    assert not isinstance(output, (list, tuple))
+    assert next(output) == 'word 0, do not stop. eg COVID19 1000.'
+    assert consumed == [0]
+    next(output)
+    assert consumed == [0, 1]
+
+
+def test_vectorize_pandas_numpy():
+    pd = pytest.importorskip("pandas")
+    np = pytest.importorskip("numpy")
+
+    f = texttidy.single_space
+
+    series = pd.Series(['hello  world', None, ' hello world '], index=[5, 6, 7])
+    output = f(series)
+    assert list(output.index) == [5, 6, 7]
+    assert output[5] == 'hello world'
+    assert pd.isna(output[6])
+    assert output[7] == 'hello world'
+
+    arr = np.array(['hello  world', np.nan, ' hello world '], dtype=object)
+    output = f(arr)
+    assert output[0] == 'hello world'
+    assert np.isnan(output[1])
+
+    arr = np.array([['hello  world'], [' hello world ']])
+    output = f(arr)
+    assert output.shape == (2, 1)
+    assert output.dtype.kind == 'U'
+    assert output.tolist() == [['hello world'], ['hello world']]
+
+
+def test_prechecks():
+    from texttidy.registry import get_step_meta
+
+    texts = [
+        'hello world', 'hello world.', ' hello world', 'hello  world', 'Bad stop.Good stop', '1,000 e.g. x-ray',
+        'COVID–19', '● bullet', '“quoted”', 'tab\there', 'stop!! now', 'a. . b', 'last;', ''
+    ]
+    for step in texttidy.list_steps():
+        check = get_step_meta(step).get('precheck')
+        if check is None:
+            continue
+        f = getattr(texttidy, step)
+        for text in texts:
+            if not check(text):
+                # Texts the pre-check rules out are returned as they are
+                assert f(text) is text, msg(text, text, f(text))
+
+    assert not get_step_meta('space_sentencestops')['precheck']('a.b', stop_chars='!')
+    assert get_step_meta('add_fullstop')['precheck']('')
+
+    # Stop characters that are not matched literally are not pre-checked
+    assert texttidy.space_sentencestops('\\D\tiK', stop_chars='^!')=='\\DiK'
+    assert texttidy.space_sentencestops('ab .c', stop_chars='!-/')=='ab.c'
+    assert texttidy.remove_duplicate_sentencestops('a  b', stop_chars='s')=='asb'
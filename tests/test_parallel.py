@@ -0,0 +1,132 @@
+import os
+import subprocess
+import sys
+
+import texttidy
+from texttidy import Pipeline
+from texttidy import parallel
+from texttidy.parallel import clean_file, run_batch
+
+
+TESTS = [
+    " Some bad  sentence.And bad stop",
+    " some other   - text 100,000. e.g. 1,00. they've",
+    "",
+    "   ",
+    "windows line ending\r",
+    "café – naïve “quoted”",
+]
+
+
+def write_input(tmp_path, n=20):
+    path = tmp_path / "input.txt"
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        for _ in range(n):
+            file.write("\n".join(TESTS) + "\n")
+    return str(path)
+
+
+def expected(n=20):
+    pipe = Pipeline(pipe=texttidy.FULLMONTY)
+    lines = [t.rstrip("\r") for t in TESTS] * n
+    return "".join((pipe(t) if t.strip() else t) + "\n" for t in lines)
+
+
+def test_clean_file(tmp_path):
+    path = write_input(tmp_path)
+    output = str(tmp_path / "output.txt")
+
+    stats = clean_file(texttidy.FULLMONTY, path, output, workers=2, shard_size=100)
+    assert stats["shards"]>1
+    assert stats["lines"]==len(TESTS) * 20
+    assert stats["bytes"]==os.path.getsize(path)
+    with open(output, encoding="utf-8", newline="") as file:
+        assert file.read()==expected()
+    assert not os.path.exists(output + ".shards")
+
+    # No trailing newline, a single shard, cleaned in process
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(TESTS[0])
+    stats = clean_file(Pipeline(pipe=texttidy.FULLMONTY), path, output, workers=1)
+    assert stats["shards"]==1
+    with open(output, encoding="utf-8") as file:
+        assert file.read()=="Some bad sentence. And bad stop.\n"
+
+    open(path, "w").close()
+    assert clean_file(texttidy.FULLMONTY, path, output)["shards"]==0
+    assert os.path.getsize(output)==0
+
+
+def test_clean_file_resume(tmp_path):
+    path = write_input(tmp_path)
+    output = str(tmp_path / "shards")
+
+    stats = clean_file(texttidy.FULLMONTY, path, output, workers=1, shard_size=100, merge=False)
+    parts = sorted(f for f in os.listdir(output) if f.endswith(".txt"))
+    assert len(parts)==stats["shards"]
+
+    def read_parts():
+        out = ""
+        for part in parts:
+            with open(os.path.join(output, part), encoding="utf-8", newline="") as file:
+                out += file.read()
+        return out
+    assert read_parts()==expected()
+
+    # Simulate a crash: the last shard never finished, the first is marked done and is not cleaned again
+    last = os.path.join(output, parts[-1])
+    os.remove(last + ".done")
+    with open(last, "w") as file:
+        file.write("partial")
+    with open(os.path.join(output, parts[0]), "a") as file:
+        file.write("kept\n")
+
+    stats = clean_file(texttidy.FULLMONTY, path, output, workers=1, shard_size=100, merge=False)
+    assert stats["resumed"]==len(parts) - 1
+    with open(os.path.join(output, parts[0]), encoding="utf-8") as file:
+        assert file.read().endswith("kept\n")
+    with open(last, encoding="utf-8") as file:
+        assert "partial" not in file.read()
+
+    # A different pipeline starts again
+    steps = texttidy.utils.generate_pipeline_file(["single_space"])
+    stats = clean_file(steps, path, output, workers=1, shard_size=100, merge=False)
+    assert stats["resumed"]==0
+
+
+def test_clean_file_resume_process(tmp_path):
+    # Set and TokenReplacer kwargs fingerprint the same in another process, so its shards are reused
+    path = write_input(tmp_path)
+    output = str(tmp_path / "shards")
+    script = (
+        "import sys, texttidy\n"
+        "from texttidy.parallel import clean_file\n"
+        "steps = {'0': {'step': 'strip_stopwords', 'kwargs': {'stopwords': frozenset(['some', 'the', 'and', 'windows', 'a'])}},\n"
+        "         '1': {'step': 'replace_tokens', 'kwargs': {'values': texttidy.TokenReplacer({'x': {'some', 'other', 'bad'}})}}}\n"
+        "pipe = texttidy.Pipeline(pipe=steps, regex_backend='re')\n"
+        "clean_file(pipe, sys.argv[1], sys.argv[2], workers=1, shard_size=100, merge=False)\n"
+    )
+    subprocess.run([sys.executable, "-c", script, path, output], env={**os.environ, "PYTHONHASHSEED": "1"}, check=True)
+
+    steps = {
+        "0": {"step": "strip_stopwords", "kwargs": {"stopwords": frozenset(["a", "windows", "and", "the", "some"])}},
+        "1": {"step": "replace_tokens", "kwargs": {"values": texttidy.TokenReplacer({"x": {"bad", "other", "some"}})}},
+    }
+    stats = clean_file(Pipeline(pipe=steps, regex_backend="re"), path, output, workers=1, shard_size=100, merge=False)
+    assert stats["resumed"]==stats["shards"]
+
+
+def test_run_batch_cache():
+    parallel._batch_pipelines.clear()
+
+    # Definitions with the same TokenReplacer content share a compiled pipeline
+    for _ in range(3):
+        steps = {"0": {"step": "replace_tokens", "kwargs": {"values": texttidy.TokenReplacer({"hello": ["hi"]})}}}
+        assert run_batch(steps, ["hi there"])==["hello there"]
+    assert len(parallel._batch_pipelines)==1
+
+    # and the cache is bounded
+    for i in range(parallel._BATCH_PIPELINES_MAXSIZE + 10):
+        steps = {"0": {"step": "replace_tokens", "kwargs": {"values": texttidy.TokenReplacer({f"x{i}": ["hi"]})}}}
+        assert run_batch(steps, ["hi"])==[f"x{i}"]
+    assert len(parallel._batch_pipelines)==parallel._BATCH_PIPELINES_MAXSIZE
@@ -1,4 +1,10 @@
 
+import os
+import pickle
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 
 import texttidy
@@ -29,3 +35,283 @@ def test_pipeline():
     pipe = Pipeline(tests[1], texttidy.FULLMONTY, verbose=True)
     pipe.run()
     assert pipe.text_output==expected[1]
+
+
+def test_pipeline_compile():
+
+    tests = [
+        " Some bad  sentence.And bad stop",
+        " some other   - text 100,000. e.g. 1,00. they've"
+    ]
+
+    pipe = Pipeline(tests, texttidy.FULLMONTY)
+    pipe.run()
+
+    compiled = pipe.compile()
+    assert compiled.run(tests)==pipe.text_output
+    assert [compiled(t) for t in tests]==pipe.text_output
+
+    steps = ['remove_punctuation', 'single_space', 'clean_quote_chars', 'clean_quote_chars']
+    pipe = Pipeline(tests, texttidy.utils.generate_pipeline_file(steps))
+    pipe.run()
+
+    compiled = pipe.compile()
+    assert compiled.steps==['remove_punctuation', 'clean_quote_chars']
+    assert compiled.run(tests)==pipe.text_output
+
+
+def test_pipeline_optimize():
+
+    tests = [
+        " Some bad  sentence.And bad stop",
+        " some other   - text 100,000. e.g. 1,00. they've",
+        "word- . next"
+    ]
+
+    pipe = Pipeline(tests, texttidy.FULLMONTY)
+    report = pipe.optimize(sample=tests)
+    assert report['steps']==12
+    assert report['optimized_steps']==11
+    assert [(c['index'], c['step'], c['by']) for c in report['changes']]==[(11, 'single_space', 8)]
+    assert report['texts']==3
+    assert report['mismatches']==[]
+    assert len(pipe.compile().steps)==11
+
+    # Steps in between that commute with or preserve a step keep it redundant
+    steps = ['clean_quote_chars', 'single_space', 'remove_numerical_commas', 'clean_quote_chars', 'space_sentencestops', 'single_space']
+    pipe = Pipeline(tests, texttidy.utils.generate_pipeline_file(steps))
+    pipe.run()
+    report = pipe.optimize(sample=tests)
+    assert [c['index'] for c in report['changes']]==[3, 5]
+    assert report['mismatches']==[]
+    assert pipe.compile().run(tests)==pipe.text_output
+
+    # Step properties are not relied on for other kwargs, or across steps that do not declare them
+    pipe = Pipeline(pipe={
+        1: {'step': 'space_sentencestops', 'kwargs': {'stop_chars': ' .'}},
+        2: {'step': 'space_sentencestops', 'kwargs': {'stop_chars': ' .'}},
+        3: {'step': 'remove_punctuation'},
+        4: {'step': 'remove_dashes'},
+        5: {'step': 'single_space'},
+    })
+    assert pipe.optimize()['changes']==[]
+
+    # Verification catches wrongly declared properties
+    texttidy.register_step(lambda text: text + "!", name="exclaim", replace=True, idempotent=True)
+    pipe = Pipeline(pipe={1: {'step': 'exclaim'}, 2: {'step': 'exclaim'}})
+    report = pipe.optimize(sample=["hi"])
+    assert report['mismatches']==[("hi", "hi!!", "hi!")]
+
+
+def test_pipeline_run_parallel():
+
+    tests = [
+        " Some bad  sentence.And bad stop",
+        " some other   - text 100,000. e.g. 1,00. they've"
+    ] * 50
+
+    pipe = Pipeline(tests, texttidy.FULLMONTY)
+    pipe.run()
+
+    # Small inputs are run serially
+    output = pipe.run_parallel(tests, workers=2)
+    assert list(output)==pipe.text_output
+
+    output = pipe.run_parallel(iter(tests), workers=2, chunksize=7, serial_threshold=10)
+    assert list(output)==pipe.text_output
+
+
+def test_pipeline_call():
+
+    tests = [
+        " Some bad  sentence.And bad stop",
+        " some other   - text 100,000. e.g. 1,00. they've"
+    ]
+
+    expected = [
+        "Some bad sentence. And bad stop.",
+        "some other text 100000. eg 100. they have."
+    ]
+
+    pipe = Pipeline(pipe=texttidy.FULLMONTY)
+    assert pipe(tests[0])==expected[0]
+    assert pipe(tests)==expected
+    assert pipe.transform_batch(tests)==expected
+
+    output = pipe.transform(iter(tests))
+    assert next(output)==expected[0]
+    assert list(output)==expected[1:]
+
+    output = pipe(iter(tests))
+    assert next(output)==expected[0]
+    assert list(output)==expected[1:]
+
+    # Calling the pipeline does not touch the run() state
+    assert pipe.text_input is None
+    assert pipe.text_output is None
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        output = list(executor.map(pipe, tests * 100))
+    assert output==expected * 100
+
+
+def test_pipeline_profile():
+
+    tests = [
+        " Some bad  sentence.And bad stop",
+        " some other   - text 100,000. e.g. 1,00. they've"
+    ]
+
+    pipe = Pipeline(tests, texttidy.FULLMONTY, profile=True)
+    pipe.run()
+    assert pipe.text_output==Pipeline(tests, texttidy.FULLMONTY)(tests)
+
+    report = pipe.profile.report(sort_by=None)
+    assert [r['step'] for r in report]==pipe.steps
+    assert all(r['calls']==2 for r in report)
+    assert report[0]['chars_in']==sum(len(t) for t in tests)
+
+    # replace_latin_abbrevs changes the second text only, remove_bullets never applies
+    assert report[0]['changed']==1
+    assert report[6]['step']=='remove_bullets'
+
+    # Pre-checks skip the steps that cannot change a text, e.g. no commas between digits in the first text
+    assert report[7]['step']=='remove_numerical_commas'
+    assert report[7]['skipped']==1
+    assert report[2]['skipped_ratio']==1.0
+
+    report = pipe.profile.report(sort_by='changed', descending=False)
+    assert report[0]['changed']<=report[-1]['changed']
+    assert 'replace_contractions' in pipe.profile.to_table()
+
+    pipe.profile.reset()
+    assert pipe.profile.report()[0]['calls']==0
+
+
+def test_pipeline_cache(tmp_path):
+
+    tests = [
+        " Some bad  sentence.And bad stop",
+        " some other   - text 100,000. e.g. 1,00. they've"
+    ]
+
+    expected = Pipeline(pipe=texttidy.FULLMONTY)(tests)
+
+    cache = texttidy.PipelineCache(maxsize=2, path=str(tmp_path / "cache.db"))
+    pipe = Pipeline(pipe=texttidy.FULLMONTY, cache=cache)
+    assert pipe(tests)==expected
+    assert pipe(tests)==expected
+    assert cache.stats['misses']==2
+    assert cache.stats['hits']==2
+
+    # A different definition does not reuse the cached output
+    other = Pipeline(pipe=texttidy.utils.generate_pipeline_file(['single_space']), cache=cache)
+    assert other(tests[0])=="Some bad sentence.And bad stop"
+    assert cache.stats['misses']==3
+    assert cache.stats['evictions']==1
+
+    # Defaults spelled out or not give the same fingerprint
+    steps = {"0": {"step": "space_sentencestops"}}
+    assert Pipeline(pipe=steps).fingerprint==Pipeline(pipe=texttidy.utils.generate_pipeline_file(['space_sentencestops'])).fingerprint
+
+    # The on-disk tier survives a new cache instance
+    cache.close()
+    cache = texttidy.PipelineCache(path=str(tmp_path / "cache.db"))
+    pipe = Pipeline(pipe=texttidy.FULLMONTY, cache=cache)
+    assert pipe(tests)==expected
+    assert cache.stats['disk_hits']==2
+    cache.close()
+
+
+def test_pipeline_fingerprint():
+
+    # Steps are identified by their registered names, not the function names
+    texttidy.register_step(lambda text: text.upper(), name="fingerprint_upper", replace=True)
+    texttidy.register_step(lambda text: text.lower(), name="fingerprint_lower", replace=True)
+    upper = Pipeline(pipe={"0": {"step": "fingerprint_upper"}})
+    lower = Pipeline(pipe={"0": {"step": "fingerprint_lower"}})
+    assert upper.fingerprint!=lower.fingerprint
+
+    # The regex backend is part of the fingerprint
+    steps = {"0": {"step": "single_space"}}
+    assert Pipeline(pipe=steps, regex_backend="re").fingerprint==Pipeline(pipe=steps, regex_backend="re").fingerprint
+    for name in texttidy.available_backends():
+        with texttidy.use_backend(name):
+            assert Pipeline(pipe=steps).fingerprint==Pipeline(pipe=steps, regex_backend=name).fingerprint
+    if "regex" in texttidy.available_backends():
+        assert Pipeline(pipe=steps, regex_backend="re").fingerprint!=Pipeline(pipe=steps, regex_backend="regex").fingerprint
+
+    # Set and TokenReplacer kwargs give the same fingerprint in every process
+    script = (
+        "import texttidy\n"
+        "steps = {'0': {'step': 'remove_pronouns', 'kwargs': {'pronouns': frozenset(['he', 'she', 'they', 'it', 'we'])}},\n"
+        "         '1': {'step': 'replace_tokens', 'kwargs': {'values': texttidy.TokenReplacer({'x': {'a', 'b', 'c'}})}}}\n"
+        "print(texttidy.Pipeline(pipe=steps, regex_backend='re').fingerprint)\n"
+    )
+    fingerprints = set()
+    for seed in ("1", "2", "3"):
+        env = {**os.environ, "PYTHONHASHSEED": seed}
+        out = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True)
+        fingerprints.add(out.stdout.strip())
+    assert len(fingerprints)==1
+
+    other = {"0": {"step": "replace_tokens", "kwargs": {"values": texttidy.TokenReplacer({"x": ["a", "d"]})}}}
+    same = {"0": {"step": "replace_tokens", "kwargs": {"values": texttidy.TokenReplacer({"x": ["a", "d"]})}}}
+    assert Pipeline(pipe=other).fingerprint==Pipeline(pipe=same).fingerprint
+    assert Pipeline(pipe=other, regex_backend="re").fingerprint not in fingerprints
+
+
+def test_pipeline_prepare():
+    from texttidy.functions import _token_replacer
+
+    # A replacement dictionary is built into a TokenReplacer once, when the pipeline is compiled
+    steps = {"0": {"step": "replace_tokens", "kwargs": {"values": {"hello": ["hi", "hey"]}}}}
+    pipe = Pipeline(pipe=steps)
+    info = _token_replacer.cache_info()
+    assert pipe(["hi there", "hey you"])==["hello there", "hello you"]
+    assert pipe.transform_batch(["hi"])==["hello"]
+    assert _token_replacer.cache_info()==info
+    assert steps["0"]["kwargs"]["values"]=={"hello": ["hi", "hey"]}
+
+
+def test_pipeline_lazy_compile():
+    from texttidy.registry import default_kwargs
+
+    # Pipelines are compiled on first use, so building or unpickling one is cheap
+    pipe = Pipeline(pipe=texttidy.FULLMONTY)
+    assert pipe._plan is None
+    assert pipe("Bad stop.Good  stop")=="Bad stop. Good stop."
+    assert pipe._plan is not None
+
+    clone = pickle.loads(pickle.dumps(pipe))
+    assert clone._plan is None
+    assert clone("Bad stop.Good  stop")=="Bad stop. Good stop."
+
+    # Step defaults are read from the signature once per function
+    info = default_kwargs.cache_info()
+    Pipeline(pipe=texttidy.FULLMONTY).compile()
+    assert default_kwargs.cache_info().misses==info.misses
+
+
+def test_pipeline_dedup():
+
+    tests = [
+        " Some bad  sentence.And bad stop",
+        " some other   - text 100,000. e.g. 1,00. they've"
+    ]
+
+    expected = Pipeline(pipe=texttidy.FULLMONTY)(tests)
+
+    pipe = Pipeline(tests * 5, texttidy.FULLMONTY, dedup=True, dedup_window=4)
+    pipe.run()
+    assert pipe.text_output==expected * 5
+
+    # Windows of 4, 4 and 2 texts with 2 distinct texts each
+    assert pipe.dedup_stats.stats=={'texts': 10, 'unique': 6, 'windows': 3, 'dedup_ratio': 0.4}
+
+    assert list(pipe.transform(iter(tests * 2)))==expected * 2
+    assert pipe(tests[0])==expected[0]
+
+    pipe.dedup_stats.reset()
+    assert pipe.transform_batch([tests[1]] * 4)==[expected[1]] * 4
+    assert pipe.dedup_stats.ratio==0.75
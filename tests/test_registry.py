@@ -0,0 +1,67 @@
+import pickle
+
+import pytest
+
+import texttidy
+from texttidy import Pipeline
+from texttidy.registry import get_step
+
+from custom_steps import shout
+
+
+def test_builtin_steps():
+    assert get_step("single_space") is texttidy.single_space
+    assert "replace_tokens" in texttidy.list_steps()
+
+    with pytest.raises(TypeError):
+        get_step("not_a_step")
+
+    with pytest.raises(TypeError):
+        Pipeline(pipe={"0": {"step": "not_a_step"}})
+
+
+def test_register_step():
+    assert get_step("shout") is shout
+
+    with pytest.raises(ValueError):
+        texttidy.register_step(lambda t: t, name="shout")
+
+    pipe = texttidy.utils.generate_pipeline_file(["single_space", "shout"])
+    assert pipe["1"]=={"step": "shout", "kwargs": {"suffix": "!"}}
+    assert Pipeline(pipe=pipe)(" hello  world ")=="HELLO WORLD!"
+
+    # Pipeline files name steps as registered, not by function name
+    pipe = texttidy.utils.generate_pipeline_file(["shout", "whisper"])
+    assert pipe["1"]=={"step": "whisper", "kwargs": {}}
+    assert Pipeline(pipe=pipe)("Hello")=="hello!"
+
+
+def test_decorated_step():
+    # Decorators of custom steps are kept by compiled, segment and arrow plans
+    pipe = Pipeline("hi", texttidy.utils.generate_pipeline_file(["shout2"]))
+    pipe.run()
+    assert pipe.text_output=="HI!"
+    assert pipe("hi")=="HI!"
+    assert pipe.compile()("hi")=="HI!"
+    assert pipe.run_chunked("one\n\ntwo", chunk_size=1)=="ONE!\n\nTWO!"
+    assert texttidy.IncrementalCleaner(pipe)("hi")=="HI!"
+    assert pipe.optimize(sample=["hi"])["mismatches"]==[]
+
+    pa = pytest.importorskip("pyarrow")
+    assert pipe(pa.array(["hi"])).to_pylist()==["HI!"]
+
+
+def test_pickle():
+    pipe = Pipeline(pipe=texttidy.utils.generate_pipeline_file(["single_space", "shout"]), cache=True)
+    pipe(" hello  world ")
+
+    clone = pickle.loads(pickle.dumps(pipe))
+    assert clone.cache is None
+    assert clone(" hello  world ")=="HELLO WORLD!"
+
+    compiled = pickle.loads(pickle.dumps(pipe.compile()))
+    assert compiled(" hello  world ")=="HELLO WORLD!"
+
+    texts = [" hello  world "] * 20
+    output = pipe.run_parallel(texts, workers=2, chunksize=3, serial_threshold=0)
+    assert list(output)==["HELLO WORLD!"] * 20
@@ -0,0 +1,206 @@
+import random
+
+import texttidy
+from texttidy import IncrementalCleaner, Pipeline
+from texttidy.benchmark import generate_corpus
+from texttidy.segment import SegmentPlan, clean_chunked, iter_chunks, split_segments
+
+
+PARAGRAPHS = [
+    "Some bad  sentence.And bad stop",
+    "some other   - text 100,000. e.g. 1,00. they've",
+    "I don't think so, -  or do I?",
+    "The end",
+]
+
+WORDS = (
+    "the of I you he she they it we e.g. e. g. i.e. COVID-19 1,000 don't we're - -- . .. ... ! ? , ; : / ( ) "
+    "\" ' • – “ ” ‘ foo Bar x-ray hello world Sentence. Stop! ok? St. Louis he. it, (he) \\n a.b -x x- *"
+).split()
+
+SEPARATORS = ["\n\n", " \n\n", "\n \n ", "\n\n\n", "\n\t\n", "\n", " ", "  ", "\t", ". "]
+
+STEPS = [
+    "single_space", "space_sentencestops", "add_fullstop", "remove_numerical_commas", "remove_bullets",
+    "clean_quote_chars", "replace_latin_abbrevs", "remove_pronouns", "remove_punctuation",
+    "remove_duplicate_sentencestops", "remove_dashes", "replace_contractions", "strip_stopwords", "replace_tokens",
+]
+
+
+def random_pipeline(rng):
+    steps = {}
+    for i in range(rng.randint(1, 6)):
+        step = rng.choice(STEPS)
+        if step=="strip_stopwords":
+            kwargs = {"stopwords": ["the", "of", "i", "you", "he"]}
+            for key in ["from_start", "from_end", "trim_punc"]:
+                if rng.random() < 0.3:
+                    kwargs[key] = False
+            steps[str(i)] = {"step": step, "kwargs": kwargs}
+        elif step=="replace_tokens":
+            steps[str(i)] = {"step": step, "kwargs": {"values": {"CITY": ["st. louis"], "X": ["he", "foo"]}}}
+        else:
+            steps[str(i)] = {"step": step}
+    return steps
+
+
+def random_document(rng):
+    n = rng.randint(1, 10)
+    parts = [rng.choice(["", " ", "\n\n"])]
+    for i in range(n):
+        parts.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 5))))
+        parts.append(rng.choice(SEPARATORS) if i < n - 1 else rng.choice(["", " ", "\n"]))
+    return "".join(parts)
+
+
+def clean_or_error(clean, text):
+    try:
+        return clean(text)
+    except IndexError:
+        return IndexError
+
+
+def test_split_segments():
+    text = "\n One.\n\n Two\n \n\nThree \n"
+    assert split_segments(text)==(["\n One.", "Two", "Three \n"], ["\n\n ", "\n \n\n"])
+
+    # Breaks next to punctuation are kept inside a segment
+    assert split_segments("One\n\n- Two")==(["One\n\n- Two"], [])
+    assert split_segments("One\nTwo")==(["One\nTwo"], [])
+    assert split_segments("See e.\n\ng. this")==(["See e.\n\ng. this"], [])
+
+
+def test_incremental_cleaner():
+    pipe = Pipeline(pipe=texttidy.FULLMONTY)
+    cleaner = IncrementalCleaner(pipe)
+    assert cleaner.segmented
+
+    doc = "\n\n".join(PARAGRAPHS)
+    assert cleaner(doc)==pipe(doc)
+    assert cleaner.stats['cleaned']==4
+
+    # Only the edited paragraph is cleaned again
+    edited = "\n\n".join(PARAGRAPHS[:2] + ["I won't think so, -  or do I?"] + PARAGRAPHS[3:])
+    assert cleaner(edited)==pipe(edited)
+    assert cleaner.stats['cleaned']==5
+    assert cleaner.stats['reused']==3
+
+    # The last paragraph is cleaned with add_fullstop, the same text elsewhere is not
+    doc = "\n\n".join(PARAGRAPHS[::-1])
+    assert cleaner(doc)==pipe(doc)
+
+    # Edge steps strip leading whitespace from the whole document
+    doc = "\n " + doc
+    assert cleaner(doc)==pipe(doc)
+    assert cleaner.stats['fallbacks']==0
+
+
+def test_incremental_cleaner_steps():
+    steps = texttidy.utils.generate_pipeline_file(['replace_contractions', 'remove_dashes'])
+    cleaner = IncrementalCleaner(steps)
+    doc = "\n\n".join(PARAGRAPHS)
+    assert cleaner(doc)==Pipeline(pipe=steps)(doc)
+    assert cleaner(doc).count("\n\n")==3
+
+    steps = {"0": {"step": "strip_stopwords", "kwargs": {"stopwords": ["the", "some", "i"]}}}
+    cleaner = IncrementalCleaner(steps)
+    doc = "\n\n".join(PARAGRAPHS[::-1])
+    assert cleaner(doc)==Pipeline(pipe=steps)(doc)
+    assert cleaner(doc).startswith("end\n\n")
+
+    # An edge paragraph removed entirely falls back to the whole document
+    doc = "the end\n\nThe"
+    assert cleaner(doc)=="end"
+    assert cleaner.stats['fallbacks']==1
+
+    cleaner = IncrementalCleaner(texttidy.utils.generate_pipeline_file(['remove_escapes']))
+    assert not cleaner.segmented
+    assert cleaner(doc)==texttidy.remove_escapes(doc)
+
+
+def test_incremental_cleaner_edges():
+    # Steps that remove the text next to a break fall back to the whole document
+    steps = texttidy.utils.generate_pipeline_file(['remove_pronouns', 'space_sentencestops'])
+    cleaner = IncrementalCleaner(steps)
+    assert cleaner("Intro text here\n\nhe\n\n... and more")=="Intro text here... and more"
+    assert cleaner.stats['fallbacks']==1
+
+    steps = texttidy.utils.generate_pipeline_file(['remove_punctuation', 'remove_dashes'])
+    assert IncrementalCleaner(steps)("wait –\n\n'\n\nNext")=="wait  Next"
+
+    # Multi-word tokens after whitespace is collapsed can span paragraphs
+    steps = texttidy.utils.generate_pipeline_file(['single_space'])
+    steps["1"] = {"step": "replace_tokens", "kwargs": {"values": {"CITY": ["st. louis"]}}}
+    assert SegmentPlan(steps).scope=='document'
+    assert IncrementalCleaner(steps)("To st.\n\nLouis")=="To CITY"
+
+    # Stopwords stripped from one edge only still strip whitespace from the other
+    for kwargs in [{"from_start": False}, {"from_end": False}, {"trim_punc": False}]:
+        steps = {"0": {"step": "strip_stopwords", "kwargs": {"stopwords": ["the"], **kwargs}}}
+        assert SegmentPlan(steps).scope=='document'
+        assert IncrementalCleaner(steps)("  cat sat.\n\nmat on the")==Pipeline(pipe=steps)("  cat sat.\n\nmat on the")
+
+
+def test_incremental_cleaner_random():
+    rng = random.Random(17)
+    for _ in range(40):
+        steps = random_pipeline(rng)
+        pipe = Pipeline(pipe=steps)
+        cleaner = IncrementalCleaner(pipe)
+        for _ in range(25):
+            doc = random_document(rng)
+            assert clean_or_error(cleaner, doc)==clean_or_error(pipe, doc), (steps, doc)
+
+
+def test_iter_chunks():
+    text = "One two. Three four.  Five\n\nsix e. g. seven"
+    chunks = list(iter_chunks(text, 1, sentences=True))
+    assert chunks==[("One two.", " "), ("Three four.", "  "), ("Five", "\n\n"), ("six e. g. seven", None)]
+    assert list(iter_chunks(text, 12))==[("One two. Three four.  Five", "\n\n"), ("six e. g. seven", None)]
+    assert list(iter_chunks(text, 100))==[(text, None)]
+
+
+def test_run_chunked():
+    text = "\n".join(generate_corpus("reviews", scale=0.1))
+    pipe = Pipeline(pipe=texttidy.FULLMONTY)
+    assert pipe.run_chunked(text, chunk_size=100)==pipe(text)
+    assert pipe.run_chunked(text, chunk_size=1)==pipe(text)
+
+    text = "\n\n".join(PARAGRAPHS)
+    steps = texttidy.utils.generate_pipeline_file(['replace_contractions', 'remove_dashes', 'add_fullstop'])
+    pipe = Pipeline(pipe=steps)
+    assert pipe.run_chunked(text, chunk_size=10)==pipe(text)
+
+    # Multi-word tokens can span sentence stops, so these pipelines are only split at paragraphs
+    steps = {"0": {"step": "replace_tokens", "kwargs": {"values": {"CITY": ["st. louis"]}}}}
+    assert SegmentPlan(steps).scope=='paragraph'
+    assert Pipeline(pipe=steps).run_chunked("To st. Louis.\n\nAnd back", chunk_size=1)=="To CITY.\n\nAnd back"
+
+
+def test_run_chunked_edges():
+    for steps, text, expected in [
+        (['remove_pronouns', 'space_sentencestops'], "Intro text here\n\nhe\n\n... and more", "Intro text here... and more"),
+        (['remove_punctuation', 'remove_dashes'], "wait –\n\n'\n\nNext", "wait  Next"),
+        (['remove_pronouns', 'replace_latin_abbrevs'], "See the e. he g. here", "See the eg here"),
+    ]:
+        pipe = Pipeline(pipe=texttidy.utils.generate_pipeline_file(steps))
+        assert pipe(text)==expected
+        assert pipe.run_chunked(text, chunk_size=1)==expected
+
+    # Stopwords stripped from one edge only still strip whitespace from the other
+    for kwargs, expected in [({"from_start": False}, "cat sat.\n\nmat on"), ({"from_end": False}, "cat sat.\n\nmat on the"), ({"trim_punc": False}, "cat sat.\n\nmat on")]:
+        pipe = Pipeline(pipe={"0": {"step": "strip_stopwords", "kwargs": {"stopwords": ["the"], **kwargs}}})
+        assert pipe.run_chunked("  cat sat.\n\nmat on the", chunk_size=3)==expected
+
+
+def test_run_chunked_random():
+    rng = random.Random(18)
+    for _ in range(40):
+        steps = random_pipeline(rng)
+        pipe = Pipeline(pipe=steps)
+        plan = SegmentPlan(pipe)
+        for _ in range(25):
+            doc = random_document(rng)
+            chunk_size = rng.randint(1, 15)
+            expected = clean_or_error(pipe, doc)
+            assert clean_or_error(lambda t: clean_chunked(plan, t, chunk_size), doc)==expected, (steps, doc, chunk_size)
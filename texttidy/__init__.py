@@ -1,5 +1,7 @@
-from .config import (CONTRACTIONS, CONTRACTIONS_EXCEPTIONS, FULLMONTY,
-                     PRONOUNS, PUNCT_ALL)
+__version__ = '0.0.2'
+
+from .backend import available_backends, set_backend, use_backend
+from .config import PUNCT_ALL
 from .functions import (add_fullstop, clean_quote_chars, remove_bullets,
                         remove_dashes, remove_duplicate_sentencestops,
                         remove_escapes, remove_numerical_commas,
@@ -7,5 +9,16 @@ from .functions import (add_fullstop, clean_quote_chars, remove_bullets,
                         replace_contractions, replace_latin_abbrevs,
                         replace_tokens, single_space, space_sentencestops,
                         strip_stopwords)
+from .cache import PipelineCache
 from .pipe import Pipeline
+from .registry import list_steps, register_step
+from .segment import IncrementalCleaner
+from .tokens import TokenReplacer
 from . import utils
+
+
+def __getattr__(name):
+    # CONTRACTIONS, CONTRACTIONS_EXCEPTIONS, PRONOUNS and FULLMONTY are loaded on first access
+    if name in config.LAZY_DATA:
+        return getattr(config, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,5 @@
+import sys
+
+from texttidy.cli import main
+
+sys.exit(main())
@@ -0,0 +1,140 @@
+""" Asyncio entry points that run pipelines in an executor without blocking the event loop """
+
+import asyncio
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from texttidy.parallel import run_batch
+
+
+def _submit(pipeline, texts, executor=None):
+    """ Clean a batch of texts in the executor. Process pools receive the pipeline pickled through the step registry. """
+    loop = asyncio.get_running_loop()
+    if isinstance(executor, ProcessPoolExecutor):
+        return loop.run_in_executor(executor, run_batch, pipeline, texts)
+    return loop.run_in_executor(executor, pipeline.transform_batch, texts)
+
+
+async def _abatches(texts, batch_size):
+    batch = []
+    if hasattr(texts, '__aiter__'):
+        async for t in texts:
+            batch.append(t)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    else:
+        for t in texts:
+            batch.append(t)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+async def atransform(pipeline, texts, executor=None, batch_size=64, max_concurrency=4):
+    """Clean an iterable or async iterable of texts in an executor, yielding results in input order.
+
+    Texts are sent to the executor in batches. At most max_concurrency batches are in flight, and no
+    more input is read until one of them completes.
+
+    Args:
+        pipeline (Pipeline): Pipeline to run.
+        texts (iterable or async iterable): Strings to clean.
+        executor (Executor, optional): Thread or process pool. Defaults to None (the event loop's default executor).
+        batch_size (int, optional): Texts per executor call. Defaults to 64.
+        max_concurrency (int, optional): Maximum batches in flight. Defaults to 4.
+
+    Yields:
+        str: cleaned texts.
+    """
+    pending = deque()
+    try:
+        async for batch in _abatches(texts, batch_size):
+            pending.append(_submit(pipeline, batch, executor))
+            if len(pending) >= max_concurrency:
+                for t in await pending.popleft():
+                    yield t
+
+        while pending:
+            for t in await pending.popleft():
+                yield t
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+class AsyncPipeline:
+    """Awaitable front end to a Pipeline for async services.
+
+    Concurrent calls to run() are collected into batches of up to batch_size texts (or whatever has
+    arrived within max_delay seconds), so the executor overhead is paid per batch rather than per
+    text. At most max_concurrency batches run at the same time.
+
+    Args:
+        pipeline (Pipeline): Pipeline to run.
+        executor (Executor, optional): Thread or process pool. Defaults to None (the event loop's default executor).
+        batch_size (int, optional): Maximum texts per executor call. Defaults to 64.
+        max_delay (float, optional): Seconds to wait for a batch to fill up. Defaults to 0.002.
+        max_concurrency (int, optional): Maximum batches in flight. Defaults to 4.
+    """
+    def __init__(self, pipeline, executor=None, batch_size=64, max_delay=0.002, max_concurrency=4):
+        self.pipeline = pipeline
+        self.executor = executor
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.max_concurrency = max_concurrency
+        self.batches = 0
+        self._queue = []
+        self._timer = None
+        self._semaphore = None
+
+
+    async def run(self, text):
+        """ Clean a single string. """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append((text, future))
+
+        if len(self._queue) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        return await future
+
+
+    __call__ = run
+
+
+    def transform(self, texts):
+        """ Clean an iterable or async iterable of strings, see atransform. """
+        return atransform(self.pipeline, texts, self.executor, self.batch_size, self.max_concurrency)
+
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._queue = self._queue, []
+        if batch:
+            asyncio.ensure_future(self._run_batch(batch))
+
+
+    async def _run_batch(self, batch):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._semaphore:
+            self.batches += 1
+            try:
+                results = await _submit(self.pipeline, [t for t, _ in batch], self.executor)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
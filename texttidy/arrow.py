@@ -0,0 +1,236 @@
+""" Optional pyarrow backend. Cleaning steps that are regex replacements, strips or translations run as pyarrow.compute kernels over whole string arrays. Requires pyarrow. """
+
+import re
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from texttidy.functions import _WHITESPACE, _unvectorized
+
+
+# pyarrow uses RE2, which has no lookarounds and ascii-only \s, \d and case folding. The patterns
+# below spell out Python's Unicode classes, and lookarounds are replaced by capturing the
+# neighbouring characters and putting them back.
+WHITESPACE = _WHITESPACE
+
+
+def _class(chars):
+    """ Contents of a regex character class matching any of chars. """
+    return "".join("\\" + c if c in "\\]^-[" else c for c in chars)
+
+
+_WS = f"[{_class(WHITESPACE)}]"
+_NOT_WS = f"[^{_class(WHITESPACE)}]"
+_DIGIT = r"\p{Nd}"
+_BULLETS = '○●•·'
+
+# Characters matched by each letter under re.IGNORECASE
+_CASES = {"i": "iIİı"}
+
+
+def _ignorecase(pattern):
+    return re.sub(r"[a-z]", lambda m: f"[{_CASES.get(m.group(), m.group() + m.group().upper())}]", pattern)
+
+
+_LATIN_ABBREVS = (
+    ("eg", _ignorecase(r"e\.g\.|e\. g\.|e\.g")),
+    ("ie", _ignorecase(r"i\.e\.|i\. e\.|i\.e")),
+    ("nb", _ignorecase(r"n\.b\.|n\. b\.|n\.b")),
+)
+
+
+def _sub(arr, pattern, replacement):
+    return pc.replace_substring_regex(arr, pattern=pattern, replacement=replacement)
+
+
+def _sub_all(arr, pattern, replacement):
+    """Replace until nothing matches.
+
+    For patterns that stand in for lookarounds, where a neighbouring character captured by one
+    match stops the next match from starting there. Only used where a replacement cannot create
+    a match that was not in the original text.
+    """
+    while pc.any(pc.match_substring_regex(arr, pattern=pattern)).as_py():
+        arr = _sub(arr, pattern, replacement)
+    return arr
+
+
+def _strip(arr):
+    return pc.utf8_trim(arr, characters=WHITESPACE)
+
+
+# Step name -> kernel taking an array and the step kwargs. A kernel returns NotImplemented for
+# kwargs it cannot handle, and the step is then run row by row.
+KERNELS = {}
+
+
+def kernel(func):
+    KERNELS[func.__name__] = func
+    return func
+
+
+@kernel
+def single_space(arr):
+    return _strip(_sub(arr, f"{_WS}{{2,}}", " "))
+
+
+@kernel
+def space_sentencestops(arr, stop_chars=".;!?,:"):
+    # Characters that change meaning when escaped or inside a class are left to Python
+    if any(c.isalnum() or c.isspace() or c in "\\]^-[" for c in stop_chars):
+        return NotImplemented
+    for c in stop_chars:
+        arr = _sub(arr, f"({re.escape(c)})([a-zA-Z])", r"\1 \2")
+    if stop_chars:
+        arr = _sub(arr, f"([a-zA-Z0-9]){_WS}+([{_class(stop_chars)}])", r"\1\2")
+    return arr
+
+
+@kernel
+def add_fullstop(arr, stop_chars='.?!', replace_chars=';:,-/'):
+    arr = _strip(arr)
+    if replace_chars:
+        arr = pc.utf8_rtrim(arr, characters=WHITESPACE + replace_chars)
+    if pc.any(pc.equal(pc.utf8_length(arr), 0)).as_py():
+        raise IndexError("string index out of range")
+    if not stop_chars:
+        return pc.binary_join_element_wise(arr, ".", "")
+    has_stop = pc.match_substring_regex(arr, pattern=f"[{_class(stop_chars)}]$")
+    return pc.if_else(has_stop, arr, pc.binary_join_element_wise(arr, ".", ""))
+
+
+@kernel
+def remove_numerical_commas(arr):
+    return _sub_all(arr, f"({_DIGIT}),({_DIGIT})", r"\1\2")
+
+
+@kernel
+def remove_dashes(arr):
+    arr = pc.replace_substring(arr, pattern='–', replacement='-')
+    arr = _sub_all(arr, f"([A-Z])-([A-Z|{_DIGIT}])", r"\1\2")
+    arr = _sub_all(arr, f"({_WS})-+({_WS})", r"\1\2")
+    # The captured characters cannot start another match, so a single pass is exact
+    arr = _sub(arr, f"({_NOT_WS})-({_WS})", r"\1\2")
+    arr = _sub(arr, f"^-({_WS})", r"\1")
+    return _sub_all(arr, f"([^a-zA-Z0-9])-([a-zA-Z|{_DIGIT}])", r"\1 \2")
+
+
+@kernel
+def remove_bullets(arr):
+    arr = _strip(arr)
+    arr = _sub(arr, f"^[{_BULLETS}]", " ")
+    arr = _strip(_sub(arr, f"[{_BULLETS}]", "."))
+    return space_sentencestops(arr)
+
+
+@kernel
+def remove_escapes(arr):
+    arr = _strip(_sub(_strip(arr), r"[\n\t\r]", ". "))
+    return space_sentencestops(arr)
+
+
+@kernel
+def clean_quote_chars(arr):
+    return _sub(_sub(arr, "[‘’´]", "'"), "[“”]", '"')
+
+
+@kernel
+def replace_latin_abbrevs(arr):
+    for rpl, pattern in _LATIN_ABBREVS:
+        arr = _sub_all(arr, f"(^|{_WS})(?:{pattern})({_WS}|$)", f"\\1{rpl}\\2")
+    return arr
+
+
+@kernel
+def remove_punctuation(arr, remove='all', keep='.,?!()%&'):
+    from texttidy import config
+
+    if remove == 'all':
+        remove = config.PUNCT_ALL
+    chars = "".join(c for c in remove if c not in keep)
+    if chars:
+        arr = _sub(arr, f"[{_class(chars)}]", " ")
+    return single_space(arr)
+
+
+@kernel
+def remove_duplicate_sentencestops(arr, stop_chars=".;!?:"):
+    if any(c.isalnum() or c.isspace() or c == "\\" for c in stop_chars):
+        return NotImplemented
+    for c in stop_chars:
+        c = re.escape(c)
+        arr = _sub_all(arr, f"({c}){_WS}({c})", r"\1\2")
+    for c in stop_chars:
+        arr = _sub(arr, f"{re.escape(c)}{{2,}}", c)
+    return arr
+
+
+def _map_rows(funcs, arr):
+    """ Apply functions to each non-null row in Python. """
+    if isinstance(arr, pa.ChunkedArray):
+        return pa.chunked_array([_map_rows(funcs, chunk) for chunk in arr.chunks], type=arr.type)
+
+    out = []
+    for text in arr.to_pylist():
+        if text is not None:
+            for func in funcs:
+                text = func(text)
+        out.append(text)
+    return pa.array(out, type=arr.type)
+
+
+def _kernel(name, func):
+    # Only for the built-in functions, not custom steps registered under the same name
+    if getattr(func, '__module__', None) != 'texttidy.functions':
+        return None
+    return KERNELS.get(name)
+
+
+def apply_step(func, arr, *args, **kwargs):
+    """Apply a cleaning function to a string array, with its kernel where there is one.
+
+    Args:
+        func (callable): Undecorated cleaning function, taking a single string.
+        arr (pyarrow.Array or pyarrow.ChunkedArray): Strings to clean. Nulls are kept.
+
+    Returns:
+        pyarrow.Array or pyarrow.ChunkedArray: cleaned strings, of the same type as arr.
+    """
+    k = _kernel(func.__name__, func)
+    if k is not None and not args:
+        out = k(arr, **kwargs)
+        if out is not NotImplemented:
+            return out
+    return _map_rows([lambda t: func(t, *args, **kwargs)], arr)
+
+
+def run_pipeline(pipeline, arr):
+    """Run a Pipeline over a string array.
+
+    Steps with a kernel run on the whole array. Runs of consecutive steps without one are
+    applied row by row in a single pass.
+
+    Args:
+        pipeline (Pipeline): Pipeline to run.
+        arr (pyarrow.Array or pyarrow.ChunkedArray): Strings to clean. Nulls are kept.
+
+    Returns:
+        pyarrow.Array or pyarrow.ChunkedArray: cleaned strings, of the same type as arr.
+    """
+    pending = []
+    for step, func, kwargs in pipeline._fuse_steps():
+        func = _unvectorized(func)
+        k = _kernel(step, func)
+        out = NotImplemented
+        if k is not None:
+            if pending:
+                arr = _map_rows(pending, arr)
+                pending = []
+            out = k(arr, **kwargs)
+        if out is NotImplemented:
+            pending.append(lambda t, func=func, kwargs=kwargs: func(t, **kwargs))
+        else:
+            arr = out
+    if pending:
+        arr = _map_rows(pending, arr)
+    return arr
@@ -0,0 +1,114 @@
+"""Selection of the regex engine used by the cleaning functions.
+
+Any module with an re compatible compile() can be used, e.g. the third-party regex package. The
+backend is set for all threads with set_backend, for a with block with use_backend, or for a single
+pipeline with Pipeline(regex_backend=...). Run python -m texttidy.benchmark --backends re regex to
+compare them.
+
+Engines can differ on edge cases: e.g. under IGNORECASE, re matches the dotless ı for i, and regex does not.
+"""
+
+import contextvars
+import importlib
+from contextlib import contextmanager
+from functools import lru_cache
+
+
+# Backend name -> module. Any module with an re compatible compile() and flags can be added.
+BACKENDS = {
+    're': 're',
+    'regex': 'regex',
+}
+
+DEFAULT = 're'
+
+# Backend for the current thread or task, set by use_backend. None means the global default.
+_current = contextvars.ContextVar('texttidy_regex_backend', default=None)
+_default = DEFAULT
+
+
+@lru_cache(maxsize=None)
+def _module(name):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown regex backend '{name}', expecting one of {list(BACKENDS)}.")
+    return importlib.import_module(BACKENDS[name])
+
+
+def available_backends():
+    """ Names of the backends that can be imported. """
+    names = []
+    for name in BACKENDS:
+        try:
+            _module(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def current_backend():
+    """ Name of the backend in use. """
+    return _current.get() or _default
+
+
+def module():
+    """ Module of the backend in use, for patterns that are compiled once and kept, e.g. by TokenReplacer. """
+    return _module(current_backend())
+
+
+def set_backend(name):
+    """Set the regex backend used by default, in all threads.
+
+    Args:
+        name (str): One of BACKENDS, e.g. "re" or "regex". The module must be installed.
+    """
+    global _default
+    _module(name)
+    _default = name
+
+
+@contextmanager
+def use_backend(name):
+    """Use a regex backend within a with block, in the current thread or task only.
+
+    Args:
+        name (str or None): One of BACKENDS. None keeps the current backend.
+    """
+    if name is None:
+        yield
+        return
+    _module(name)
+    token = _current.set(name)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+@lru_cache(maxsize=512)
+def _compile(name, pattern, flags):
+    return _module(name).compile(pattern, flags)
+
+
+def compile(pattern, flags=0):
+    """ Compile a pattern with the current backend. Compiled patterns are cached per backend. """
+    return _compile(_current.get() or _default, pattern, flags)
+
+
+def per_backend(factory):
+    """Decorator for a function factory(compile) that builds a set of patterns, e.g. as a namespace.
+
+    Returns a function that takes no arguments and returns the patterns for the current backend,
+    built on first use with a compile function for that backend.
+    """
+    built = {}
+
+    def get():
+        name = _current.get() or _default
+        try:
+            return built[name]
+        except KeyError:
+            patterns = built[name] = factory(lambda pattern, flags=0: _compile(name, pattern, flags))
+            return patterns
+
+    return get
@@ -0,0 +1,320 @@
+""" Benchmarks for the cleaning functions and pipelines on reproducible synthetic corpora.
+
+Run with:
+    python -m texttidy.benchmark -o results.json
+    python -m texttidy.benchmark --compare results.json
+"""
+
+import argparse
+import inspect
+import itertools
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import texttidy
+from texttidy import backend, config
+
+
+WORDS = (
+    "the of and to in is was that for it with as on be at by this had not are but from or have an they which "
+    "one you were all we there can her has more if will would about out what so up time them some into when "
+    "customer product delivery quality price service order review shipping support battery screen camera "
+    "COVID-19 one-to-one 5-10 x-ray e.g. i.e. N.B. 1,000,000 100,0 123,456.00 2nd 1st 42 3.14"
+).split()
+
+UNICODE_WORDS = (
+    "café naïve résumé Zürich façade São Paulo Ærø smörgåsbord crème brûlée "
+    "東京 北京 서울 Москва Αθήνα עברית العربية हिन्दी "
+    "😀 👍 🎉 ✓ — – ‘quoted’ “double” ´ « » ° ± © ™"
+).split()
+
+STOPWORDS = ['i', 'say', 'to', 'you', 'the', 'a', 'and', 'of']
+
+TOKENS = {
+    "hello": ["hi", "hey", "howdy"],
+    "product": ["item", "goods"],
+    "customer": ["client", "buyer", "user"],
+}
+
+# Extra positional arguments for functions that need them
+FUNCTION_ARGS = {
+    "replace_tokens": (TOKENS,),
+    "strip_stopwords": (STOPWORDS,),
+}
+
+
+def _vocabulary():
+    contractions = list(config.CONTRACTIONS)
+    return WORDS * 4 + contractions + [c.replace("'", "") for c in contractions] + config.PRONOUNS
+
+
+def _sentence(rng, vocab, n_words, punct=".!?", seps=(" ",)):
+    words = [rng.choice(vocab) for _ in range(n_words)]
+    words[0] = words[0].capitalize()
+    return rng.choice(seps).join(words) + rng.choice(punct)
+
+
+def _text(rng, vocab, n_words, seps=(" ", " ", " ", "  ")):
+    out = []
+    while n_words > 0:
+        n = min(n_words, rng.randint(5, 25))
+        out.append(_sentence(rng, vocab, n, seps=seps))
+        n_words -= n
+    return rng.choice([" ", "  ", "\n"]).join(out)
+
+
+def tweets(rng, scale=1.0):
+    vocab = _vocabulary() + ["#sale", "@shop", "lol", "!!", "...", "??"]
+    return [_text(rng, vocab, rng.randint(5, 30)) for _ in range(int(2000 * scale) or 1)]
+
+
+def reviews(rng, scale=1.0):
+    vocab = _vocabulary()
+    docs = []
+    for _ in range(int(500 * scale) or 1):
+        paragraphs = [_text(rng, vocab, rng.randint(30, 80)) for _ in range(rng.randint(1, 4))]
+        docs.append("\n\n".join(paragraphs))
+    return docs
+
+
+def documents(rng, scale=1.0):
+    # A couple of multi-megabyte documents, ~6 characters per word
+    vocab = _vocabulary() + ["•", "●", "-", "–", "\n", "\t"]
+    n_words = int(350000 * scale) or 100
+    return [_text(rng, vocab, n_words) for _ in range(2)]
+
+
+def punctuation(rng, scale=1.0):
+    marks = list(config.PUNCT_ALL) + ["...", "!!", "?!", ". .", " - ", "•", "●", "○", "·", "\\n"]
+    vocab = _vocabulary() + marks * 6
+    return [_text(rng, vocab, rng.randint(20, 60), seps=(" ", "", "  ")) for _ in range(int(1000 * scale) or 1)]
+
+
+def unicode(rng, scale=1.0):
+    vocab = _vocabulary() + UNICODE_WORDS * 10
+    seps = (" ", " ", " ", "　", "  ")
+    return [_text(rng, vocab, rng.randint(20, 80), seps=seps) for _ in range(int(1000 * scale) or 1)]
+
+
+CORPORA = {
+    "tweets": tweets,
+    "reviews": reviews,
+    "documents": documents,
+    "punctuation": punctuation,
+    "unicode": unicode,
+}
+
+
+def generate_corpus(name, seed=0, scale=1.0):
+    """Generate a reproducible synthetic corpus.
+
+    Args:
+        name (str): One of CORPORA (tweets, reviews, documents, punctuation, unicode).
+        seed (int, optional): Random seed. Defaults to 0.
+        scale (float, optional): Multiplier on the corpus size. Defaults to 1.0.
+
+    Returns:
+        list: list of strings.
+    """
+    if name not in CORPORA:
+        raise ValueError(f"Unknown corpus '{name}', expecting one of {list(CORPORA)}.")
+    return CORPORA[name](random.Random(f"{name}-{seed}"), scale)
+
+
+def public_functions():
+    """ Cleaning functions exported by texttidy, as a {name: function} dictionary. """
+    return {
+        name: f for name, f in inspect.getmembers(texttidy, inspect.isfunction)
+        if f.__module__ == 'texttidy.functions'
+    }
+
+
+IMPORT_SCRIPT = "import time; start = time.perf_counter(); import texttidy; print(time.perf_counter() - start)"
+
+
+def import_time(repeat=5):
+    """ Best time in seconds to import texttidy in a fresh interpreter. """
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], check=True, capture_output=True, text=True)
+        times.append(float(out.stdout))
+    return times
+
+
+def _time(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run_benchmarks(corpora=None, functions=None, pipelines=None, repeat=3, scale=1.0, seed=0, imports=True, backends=None):
+    """Time cleaning functions and pipelines over each corpus.
+
+    Args:
+        corpora (list, optional): Corpus names. Defaults to all of CORPORA.
+        functions (list, optional): Function names. Defaults to every public cleaning function.
+        pipelines (dict, optional): {name: pipeline definition}. Defaults to {"FULLMONTY": texttidy.FULLMONTY}.
+        repeat (int, optional): Number of timed repeats, the best is reported. Defaults to 3.
+        scale (float, optional): Multiplier on corpus sizes. Defaults to 1.0.
+        seed (int, optional): Corpus seed. Defaults to 0.
+        imports (bool, optional): Also time "import texttidy" in a fresh interpreter. Defaults to True.
+        backends (list, optional): Regex backends to run each benchmark with, see texttidy.backend. Defaults to None (the current backend only).
+
+    Returns:
+        dict: JSON serialisable results, keyed by "<function or pipeline>/<corpus>", or "<function or pipeline>@<backend>/<corpus>" if backends are given.
+    """
+    corpora = corpora or list(CORPORA)
+    all_functions = public_functions()
+    functions = functions or sorted(all_functions)
+    if pipelines is None:
+        pipelines = {"FULLMONTY": texttidy.FULLMONTY}
+
+    targets = {}
+    for name in functions:
+        if name not in all_functions:
+            raise ValueError(f"'{name}' is not a public texttidy function.")
+        f, args = all_functions[name], FUNCTION_ARGS.get(name, ())
+        targets[name] = lambda texts, f=f, args=args: [f(t, *args) for t in texts]
+    for name, pipe in pipelines.items():
+        targets[name] = texttidy.Pipeline(pipe=pipe).transform_batch
+
+    results = {}
+    if imports:
+        times = import_time(max(repeat, 5))
+        results["import/texttidy"] = {"best": min(times), "mean": sum(times) / len(times)}
+
+    for corpus in corpora:
+        texts = generate_corpus(corpus, seed=seed, scale=scale)
+        n_chars = sum(len(t) for t in texts)
+        for (name, target), regex_backend in itertools.product(targets.items(), backends or [None]):
+            with backend.use_backend(regex_backend):
+                times = _time(lambda: target(texts), repeat)
+            best = min(times)
+            key = name if regex_backend is None else f"{name}@{regex_backend}"
+            results[f"{key}/{corpus}"] = {
+                "best": best,
+                "mean": sum(times) / len(times),
+                "texts": len(texts),
+                "chars": n_chars,
+                "chars_per_second": n_chars / best if best > 0 else None,
+            }
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "scale": scale,
+            "seed": seed,
+            "backends": backends or [backend.current_backend()],
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=1.2):
+    """Compare benchmark results with a saved baseline.
+
+    Args:
+        current (dict): Results from run_benchmarks.
+        baseline (dict): Earlier results from run_benchmarks.
+        threshold (float, optional): Flag benchmarks that are slower than the baseline by more than this ratio. Defaults to 1.2.
+
+    Returns:
+        list: one dictionary per benchmark present in both, with the ratio and a regression flag.
+    """
+    rows = []
+    for key, result in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None or not base["best"]:
+            continue
+        ratio = result["best"] / base["best"]
+        rows.append({
+            "benchmark": key,
+            "baseline": base["best"],
+            "current": result["best"],
+            "ratio": ratio,
+            "regression": ratio > threshold,
+        })
+    return rows
+
+
+def compare_backends(results):
+    """Compare the regex backends of results from run_benchmarks(backends=...).
+
+    Args:
+        results (dict): Results from run_benchmarks, run with two or more backends.
+
+    Returns:
+        list: one dictionary per "<function or pipeline>/<corpus>", with the best time per backend, the fastest backend and its speedup over the first backend.
+    """
+    first = results["meta"]["backends"][0]
+    grouped = {}
+    for key, result in results["results"].items():
+        name, sep, corpus = key.partition("/")
+        target, at, regex_backend = name.partition("@")
+        if at:
+            grouped.setdefault(f"{target}/{corpus}", {})[regex_backend] = result["best"]
+
+    rows = []
+    for key, times in grouped.items():
+        fastest = min(times, key=times.get)
+        rows.append({
+            "benchmark": key,
+            "times": times,
+            "fastest": fastest,
+            "speedup": times[first] / times[fastest] if times.get(first) and times[fastest] else None,
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m texttidy.benchmark', description='Benchmark texttidy on synthetic corpora.')
+    parser.add_argument('-o', '--output', default=None, help="Write results as json to this file.")
+    parser.add_argument('--compare', default=None, help="Baseline json file to compare against.")
+    parser.add_argument('--threshold', type=float, default=1.2, help="Slowdown ratio flagged as a regression. Defaults to 1.2.")
+    parser.add_argument('--corpora', nargs='+', default=None, choices=list(CORPORA), help="Corpora to run. Defaults to all.")
+    parser.add_argument('--functions', nargs='+', default=None, help="Functions to run. Defaults to all public functions.")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed repeats per benchmark. Defaults to 3.")
+    parser.add_argument('--scale', type=float, default=1.0, help="Multiplier on corpus sizes. Defaults to 1.0.")
+    parser.add_argument('--seed', type=int, default=0, help="Corpus seed. Defaults to 0.")
+    parser.add_argument('--backends', nargs='+', default=None, choices=list(backend.BACKENDS), help="Regex backends to compare. Defaults to the current backend only.")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.corpora, args.functions, repeat=args.repeat, scale=args.scale, seed=args.seed, backends=args.backends)
+
+    if args.output is not None:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare is None:
+        for key, r in results["results"].items():
+            rate = f"{r['chars_per_second'] / 1e6:8.2f}M chars/s" if r.get('chars_per_second') else ""
+            print(f"{key:<50} {r['best'] * 1000:10.2f} ms  {rate}")
+        if args.backends is not None and len(args.backends) > 1:
+            print()
+            for r in compare_backends(results):
+                times = "  ".join(f"{b} {t * 1000:8.2f} ms" for b, t in r["times"].items())
+                print(f"{r['benchmark']:<50} {times}  fastest: {r['fastest']} x{r['speedup']:.2f}")
+        return 0
+
+    with open(args.compare) as file:
+        baseline = json.load(file)
+
+    rows = compare(results, baseline, threshold=args.threshold)
+    for r in rows:
+        flag = "REGRESSION" if r["regression"] else ""
+        print(f"{r['benchmark']:<50} {r['baseline'] * 1000:10.2f} ms -> {r['current'] * 1000:10.2f} ms  x{r['ratio']:.2f} {flag}")
+
+    return 1 if any(r["regression"] for r in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,161 @@
+""" Result cache for pipeline outputs, with a bounded in-memory LRU tier and an optional on-disk tier """
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+
+def _canonical(value):
+    """ json encoding of kwargs that json does not support, the same in every process. """
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=canonical_json)
+    digest = getattr(value, 'digest', None)
+    if isinstance(digest, str):
+        # e.g. TokenReplacer, identified by its content
+        return {type(value).__name__: digest}
+    return repr(value)
+
+
+def canonical_json(value):
+    """ json string of a value, with dict keys and set items sorted so that it does not depend on the process. """
+    return json.dumps(value, sort_keys=True, default=_canonical)
+
+
+def pipeline_fingerprint(names, funcs, kwargs, regex_backend=None):
+    """Hash of a normalised pipeline definition.
+
+    Each step's kwargs are merged with the function defaults, so definitions that only differ by
+    spelling out default values have the same fingerprint. The regex backend and the texttidy
+    version are part of the hash, as either can change the output.
+
+    Args:
+        names (list): Registered step names.
+        funcs (list): Step functions.
+        kwargs (list): Step kwargs, one dictionary per step.
+        regex_backend (str, optional): Regex backend the pipeline runs with. Defaults to None.
+
+    Returns:
+        str: hex digest.
+    """
+    from texttidy import __version__
+    from texttidy.registry import normalised_kwargs
+
+    definition = canonical_json({
+        'version': __version__,
+        'regex_backend': regex_backend,
+        'steps': [[name, normalised_kwargs(func, kwarg)] for name, func, kwarg in zip(names, funcs, kwargs)],
+    })
+    return hashlib.sha256(definition.encode('utf-8')).hexdigest()
+
+
+class PipelineCache:
+    """Cache of cleaned texts keyed by pipeline fingerprint and input text.
+
+    Args:
+        maxsize (int, optional): Maximum number of entries kept in memory. The least recently used entry is evicted first. Defaults to 10000.
+        path (str, optional): sqlite file for a persistent tier that survives restarts. Defaults to None (memory only).
+    """
+    def __init__(self, maxsize=10000, path=None):
+        self.maxsize = maxsize
+        self.path = path
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            import sqlite3
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT)")
+            self._db.commit()
+        self.reset_stats()
+
+
+    @staticmethod
+    def key(fingerprint, text):
+        """ Cache key for a text cleaned by the pipeline with the given fingerprint. """
+        h = hashlib.sha256(fingerprint.encode('utf-8'))
+        h.update(b'\0')
+        h.update(text.encode('utf-8', 'surrogatepass'))
+        return h.hexdigest()
+
+
+    def get(self, key):
+        """ Cached value for key, or None. """
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return value
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self.disk_hits += 1
+                    self._set_memory(key, row[0])
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+
+    def set(self, key, value):
+        """ Store value in memory and, if enabled, on disk. """
+        with self._lock:
+            self._set_memory(key, value)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)", (key, value))
+                self._db.commit()
+
+
+    def _set_memory(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+
+    def reset_stats(self):
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+    @property
+    def stats(self):
+        """ Hit, miss and eviction counters as a dictionary. """
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._memory),
+                'hit_ratio': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+
+    def clear(self):
+        """ Remove all entries, in memory and on disk. """
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache")
+                self._db.commit()
+
+
+    def close(self):
+        """ Close the on-disk tier. """
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+    def __len__(self):
+        return len(self._memory)
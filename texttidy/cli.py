@@ -0,0 +1,186 @@
+""" texttidy command line cleaner. Streams records from a file or stdin through a pipeline. """
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+
+from texttidy import config
+from texttidy.parallel import run_parallel
+
+
+FORMATS = ('text', 'jsonl', 'csv')
+
+
+def _infer_format(path):
+    ext = os.path.splitext(path or '')[1].lower()
+    if ext in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if ext == '.csv':
+        return 'csv'
+    return 'text'
+
+
+def _read_text(file, args):
+    for line in file:
+        line = line.rstrip('\r\n')
+        yield line, line
+
+
+def _read_jsonl(file, args):
+    for line in file:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        yield record, record.get(args.field) if isinstance(record, dict) else None
+
+
+def _read_csv(file, args):
+    reader = csv.DictReader(file)
+    if reader.fieldnames is None or args.column not in reader.fieldnames:
+        raise ValueError(f"Column '{args.column}' not found in csv header.")
+    for record in reader:
+        yield record, record[args.column]
+
+
+def _text_writer(file, args):
+    def write(record, text):
+        file.write(text + '\n')
+    return write
+
+
+def _jsonl_writer(file, args):
+    def write(record, text):
+        if text is not None:
+            record[args.field] = text
+        file.write(json.dumps(record, ensure_ascii=False) + '\n')
+    return write
+
+
+def _csv_writer(file, args):
+    writer = None
+
+    def write(record, text):
+        nonlocal writer
+        if writer is None:
+            writer = csv.DictWriter(file, fieldnames=list(record))
+            writer.writeheader()
+        record[args.column] = text
+        writer.writerow(record)
+    return write
+
+
+# Stands in for a skipped record while cleaned records are in flight. Its output is discarded.
+_PLACEHOLDER = 'x'
+
+
+READERS = {'text': _read_text, 'jsonl': _read_jsonl, 'csv': _read_csv}
+WRITERS = {'text': _text_writer, 'jsonl': _jsonl_writer, 'csv': _csv_writer}
+
+
+def load_pipeline(path=None):
+    """ Load a pipeline json file, e.g. one written by utils.generate_pipeline_file. Defaults to FULLMONTY. """
+    if path is None:
+        return config.FULLMONTY
+    with open(path) as file:
+        return json.load(file)
+
+
+def clean_stream(records, write, pipe, workers=1, chunksize=256):
+    """Clean (record, text) pairs through a pipeline and write each result as soon as it is ready.
+
+    Records whose text is missing or blank are written unchanged. Only the records in flight are
+    held in memory: skipped records are written straight away when nothing is in flight, otherwise
+    they are passed through the pipeline as placeholders to keep their place in the output.
+
+    Args:
+        records (iterable): (record, text) pairs.
+        write (callable): Called as write(record, cleaned_text) in input order.
+        pipe (dict): Pipeline definition.
+        workers (int, optional): Number of worker processes. Defaults to 1.
+        chunksize (int, optional): Texts sent to a worker at a time. Defaults to 256.
+
+    Returns:
+        tuple: number of records and number of characters read.
+    """
+    buffer = deque()
+    n_records = 0
+    n_chars = 0
+
+    def texts():
+        nonlocal n_records, n_chars
+        for record, text in records:
+            n_records += 1
+            if isinstance(text, str) and text.strip() != "":
+                n_chars += len(text)
+                buffer.append((record, text, True))
+                yield text
+            elif not buffer:
+                write(record, text)
+            else:
+                buffer.append((record, text, False))
+                yield _PLACEHOLDER
+
+    for cleaned in run_parallel(pipe, texts(), workers=workers, chunksize=chunksize):
+        record, text, clean = buffer.popleft()
+        write(record, cleaned if clean else text)
+
+    return n_records, n_chars
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='texttidy',
+        description='Clean newline-delimited text, JSONL or CSV records with a texttidy pipeline.'
+        )
+    parser.add_argument('input', nargs='?', default='-', help="Input file. Defaults to stdin ('-').")
+    parser.add_argument('-o', '--output', default='-', help="Output file. Defaults to stdout ('-').")
+    parser.add_argument('-f', '--format', choices=FORMATS, default=None, help="Input format. Inferred from the input file extension, otherwise 'text'.")
+    parser.add_argument('--field', default='text', help="JSONL field to clean. Defaults to 'text'.")
+    parser.add_argument('--column', default='text', help="CSV column to clean. Defaults to 'text'.")
+    parser.add_argument('-p', '--pipeline', default=None, help="Pipeline json file. Defaults to the FULLMONTY pipeline.")
+    parser.add_argument('-w', '--workers', type=int, default=1, help="Number of worker processes. Defaults to 1.")
+    parser.add_argument('--chunksize', type=int, default=256, help="Records sent to a worker at a time. Defaults to 256.")
+    parser.add_argument('-q', '--quiet', action='store_true', help="Do not report throughput.")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    fmt = args.format or _infer_format(None if args.input == '-' else args.input)
+    pipe = load_pipeline(args.pipeline)
+
+    newline = '' if fmt == 'csv' else None
+    infile = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8', newline=newline)
+    outfile = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline=newline)
+
+    start = time.perf_counter()
+    try:
+        records = READERS[fmt](infile, args)
+        write = WRITERS[fmt](outfile, args)
+        n_records, n_chars = clean_stream(records, write, pipe, workers=args.workers, chunksize=args.chunksize)
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+        else:
+            outfile.flush()
+    elapsed = time.perf_counter() - start
+
+    if not args.quiet:
+        rate = n_records / elapsed if elapsed > 0 else float('inf')
+        char_rate = n_chars / elapsed / 1e6 if elapsed > 0 else float('inf')
+        print(
+            f"texttidy: {n_records} records ({n_chars} chars) in {elapsed:.2f}s, "
+            f"{rate:.0f} records/s, {char_rate:.2f}M chars/s",
+            file=sys.stderr
+            )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,37 +1,54 @@
-
-import importlib.resources
 import json
 
-import texttidy
 
-from . import data
+PUNCT_ALL = '!"#$£€%&\'()*+,-./:;<=>?@[\\]^_`{|}~©™•_”~[]¦¬¿●·±®○«»°，'
+
+
+def _open_data(filename):
+    import importlib.resources
+    from . import data
+    return importlib.resources.open_text(data, filename)
 
 
 def load_contractions():
-    with importlib.resources.open_text(data, "common_contractions.json") as file:
+    with _open_data("common_contractions.json") as file:
         return json.load(file)
 
 
 def load_contraction_exceptions():
-    with importlib.resources.open_text(data, "common_contractions_exceptions.txt") as file:
+    with _open_data("common_contractions_exceptions.txt") as file:
         return file.read().split()
 
 
 def load_pronouns():
-    with importlib.resources.open_text(data, "pronouns.txt") as file:
+    with _open_data("pronouns.txt") as file:
         return file.read().split()
 
 
 def load_fullmonty_pipeline():
-    with importlib.resources.open_text(data, "fullmonty.json") as file:
+    with _open_data("fullmonty.json") as file:
         return json.load(file)
 
 
-CONTRACTIONS = load_contractions()
-CONTRACTIONS_EXCEPTIONS = load_contraction_exceptions()
-PRONOUNS = load_pronouns()
+# Data files are loaded on first access of these module attributes
+LAZY_DATA = {
+    "CONTRACTIONS": load_contractions,
+    "CONTRACTIONS_EXCEPTIONS": load_contraction_exceptions,
+    "PRONOUNS": load_pronouns,
+    # Pipeline
+    "FULLMONTY": load_fullmonty_pipeline,
+}
+
+
+def __getattr__(name):
+    loader = LAZY_DATA.get(name)
+    if loader is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = loader()
+    # Later lookups find the value directly
+    globals()[name] = value
+    return value
 
-PUNCT_ALL = '!"#$£€%&\'()*+,-./:;<=>?@[\\]^_`{|}~©™•_”~[]¦¬¿●·±®○«»°，'
 
-# Pipeline
-FULLMONTY = load_fullmonty_pipeline()
+def __dir__():
+    return sorted(set(globals()) | set(LAZY_DATA))
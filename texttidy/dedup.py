@@ -0,0 +1,75 @@
+""" Batch cleaning that runs each distinct text once and scatters the results back into input order """
+
+import itertools
+import threading
+
+
+class DedupStats:
+    """ Number of texts seen and distinct texts cleaned by dedup_map, accumulated across calls. """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+
+    def reset(self):
+        self.texts = 0
+        self.unique = 0
+        self.windows = 0
+
+
+    def record(self, texts, unique):
+        with self._lock:
+            self.texts += texts
+            self.unique += unique
+            self.windows += 1
+
+
+    @property
+    def ratio(self):
+        """ Fraction of texts that were duplicates and did not need cleaning. """
+        return 1 - self.unique / self.texts if self.texts else 0.0
+
+
+    @property
+    def stats(self):
+        """ Counters and dedup ratio as a dictionary. """
+        with self._lock:
+            return {
+                'texts': self.texts,
+                'unique': self.unique,
+                'windows': self.windows,
+                'dedup_ratio': self.ratio,
+            }
+
+
+def dedup_map(func, texts, window=65536, stats=None):
+    """Apply func to an iterable of texts, calling it once per distinct text.
+
+    Texts are read in windows of up to window texts. Within a window, duplicates are found by
+    hashing, func runs on each distinct text and the results are scattered back into input order.
+    Only one window is held in memory at a time, so duplicates in different windows are cleaned
+    again; use a PipelineCache to reuse results across windows and calls.
+
+    Args:
+        func (callable): Function taking and returning a string, e.g. a compiled pipeline.
+        texts (iterable): Strings to clean. Can be a generator.
+        window (int, optional): Maximum number of texts deduplicated together. Defaults to 65536.
+        stats (DedupStats, optional): Record the number of texts and distinct texts here. Defaults to None.
+
+    Yields:
+        str: results, in input order.
+    """
+    it = iter(texts)
+    while True:
+        chunk = list(itertools.islice(it, window))
+        if not chunk:
+            return
+
+        index = {}
+        order = [index.setdefault(t, len(index)) for t in chunk]
+        results = [func(t) for t in index]
+        if stats is not None:
+            stats.record(len(chunk), len(results))
+
+        for i in order:
+            yield results[i]
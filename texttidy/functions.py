@@ -1,9 +1,14 @@
 
 import json
 import re
-from functools import wraps
+import sys
+from collections.abc import Iterable
+from functools import lru_cache, partial, wraps
+from types import SimpleNamespace
 
-from texttidy import config
+from texttidy import backend, config
+from texttidy.registry import register_step
+from texttidy.tokens import TokenReplacer
 
 
 # Additional functions
@@ -16,200 +21,464 @@ from texttidy import config
 # remove un-opened or un-closed brackets
 
 
+_BULLETS = '○●•·'
+_LATIN_ABBREVS = ("eg", "ie", "nb")
+
+
+@backend.per_backend
+def _patterns(compile):
+    """ Patterns that do not depend on function arguments, compiled once per regex backend. """
+    return SimpleNamespace(
+        multispace=compile(r"\s{2,}"),
+        numerical_comma=compile(r"((?<=\d)\,(?=\d))"),
+        dashes=(
+            # remove dashes between word and numbers
+            (compile(r"((?<=[A-Z])\-(?=[A-Z|\d]))"), ""),
+            # remove dashes seperated by white spaces. incl long and short dashes
+            (compile(r"((?<=\s){1,}\-{1,}(?=\s){1,})"), ""),
+            # space dashes that follow any non-whitespace and followed by a whitespace
+            # eg hello- world --> hello world
+            (compile(r"((?<=[\S])\-(?=\s))"), ""),
+            # Remove dashes at the start of a string
+            (compile(r"(^\-(?=\s){1,})"), ""),
+            # Remove dashes that follow a sentence stop
+            (compile(r"((?<=[^a-zA-Z0-9])\-(?=[a-zA-Z|\d]))"), " "),
+        ),
+        # Bullets and fancy quotes are all non-ascii, so ascii text never needs changing. For other
+        # text a character class substitution is faster than str.translate.
+        bullet=compile(f"[{_BULLETS}]"),
+        escapes=compile(r"[\n\t\r]"),
+        single_quotes=compile(r"[‘’´]"),
+        double_quotes=compile(r"[“”]"),
+        latin_abbrevs=compile(
+            r"(?:(?<=\s)|^)(?:(e\.g\.|e\. g\.|e\.g)|(i\.e\.|i\. e\.|i\.e)|(n\.b\.|n\. b\.|n\.b))(?:(?=\s)|$)",
+            re.IGNORECASE
+            ),
+    )
+
+
+# Patterns built from function arguments, once per distinct set of arguments and regex backend.
+# The caches are bounded, see pattern_cache_info for their statistics.
+_WHITESPACE = "".join(c for c in map(chr, range(0x3001)) if c.isspace())
+
+
+def _plain_chars(chars):
+    """ True if every character of chars is matched literally when escaped with a backslash, and can go anywhere in a character class. """
+    return all(not (c.isascii() and c.isalnum()) and c not in "\\[]^" and not c.isspace() for c in chars)
+
+
+@lru_cache(maxsize=64)
+def _literal_chars(chars):
+    """ True if patterns built from chars only match the characters themselves, so a pre-check can look for them in the text. A "-" can make a range in a class. """
+    return _plain_chars(chars) and '-' not in chars
+
+
+def _sub_each(subs, text):
+    for rx, rpl in subs:
+        text = rx.sub(rpl, text)
+    return text
+
+
+@lru_cache(maxsize=64)
+def _sentencestop_spacer(stop_chars, regex_backend):
+    """ Function applying space_sentencestops with the given stop_chars. """
+    compile = backend.module().compile
+    if _plain_chars(stop_chars):
+        chars = "".join(re.escape(c) for c in stop_chars)
+        subs = [(compile(f"([{chars}])(?=[a-zA-Z])"), r"\1 ")]
+    else:
+        # Letters, digits and class syntax mean something else escaped or in a class, so these keep a pass per character
+        subs = [(compile(f"(\\{c}(?=[a-zA-Z]))"), f"{c} ") for c in stop_chars]
+    subs.append((compile(fr"((?<=[a-zA-Z0-9])\s{{1,}}(?=[{stop_chars}]))"), ''))
+    return partial(_sub_each, subs)
+
+
+@lru_cache(maxsize=64)
+def _duplicate_stop_remover(stop_chars, regex_backend):
+    """ Function applying remove_duplicate_sentencestops with the given stop_chars. """
+    compile = backend.module().compile
+    if _plain_chars(stop_chars):
+        # A run of one stop character, with at most one whitespace character between each, becomes one stop
+        chars = "".join(re.escape(c) for c in stop_chars)
+        return partial(compile(f"([{chars}])(?:\\s?\\1)+").sub, r"\1")
+
+    subs = [(compile(f"(?<=\\{c})\\s(?=\\{c})"), "") for c in stop_chars]
+    subs += [(compile(f"\\{c}{{2,}}"), f"{c}") for c in stop_chars]
+    return partial(_sub_each, subs)
+
+
+@lru_cache(maxsize=64)
+def _pronoun_pattern(pronouns, regex_backend):
+    """ Pattern matching any of pronouns (a tuple, or "default" for config.PRONOUNS) as a whole word. """
+    if pronouns == 'default':
+        pronouns = config.PRONOUNS
+    s = "|".join(pronouns)
+    return backend.module().compile(rf"\b({s})\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=64)
+def _fullstop_strip_chars(replace_chars):
+    """ Characters stripped from the end of the text by add_fullstop. """
+    return _WHITESPACE + replace_chars
+
+
+def pattern_cache_info():
+    """ Hit and miss statistics of the caches of patterns built from function arguments, as {name: functools cache info}. """
+    caches = (
+        _sentencestop_spacer, _duplicate_stop_remover, _pronoun_pattern, _fullstop_strip_chars,
+        _punctuation_replacer, _token_replacer,
+    )
+    return {f.__name__.lstrip('_'): f.cache_info() for f in caches}
+
+
+# Fast pre-checks. Each takes the same arguments as its step and returns False only when the step
+# would return the text unchanged, so the step can return early. Pipeline profiles count how often
+# a step is skipped this way.
+def _has_any(text, chars):
+    """ True if text contains any of chars. """
+    for c in chars:
+        if c in text:
+            return True
+    return False
+
+
+def _has_edge_space(text):
+    return text[:1].isspace() or text[-1:].isspace()
+
+
+def _check_single_space(text):
+    return _has_edge_space(text) or _patterns().multispace.search(text) is not None
+
+
+def _check_space_sentencestops(text, stop_chars=".;!?,:"):
+    # Other stop characters mean something else in a pattern, e.g. "^" or "d"
+    return not _literal_chars(stop_chars) or _has_any(text, stop_chars)
+
+
+def _check_add_fullstop(text, stop_chars='.?!', replace_chars=';:,-/'):
+    # Empty text is passed through to raise as before
+    if not text or _has_edge_space(text):
+        return True
+    return text[-1] not in stop_chars or (replace_chars is not None and text[-1] in replace_chars)
+
+
+def _check_remove_numerical_commas(text):
+    return ',' in text
+
+
+def _check_remove_dashes(text):
+    return '-' in text or '–' in text
+
+
+def _check_remove_bullets(text):
+    return _has_edge_space(text) or _check_space_sentencestops(text) or (not text.isascii() and _has_any(text, _BULLETS))
+
+
+def _check_remove_escapes(text):
+    return _has_edge_space(text) or _check_space_sentencestops(text) or _has_any(text, "\n\t\r")
+
+
+def _check_clean_quote_chars(text):
+    return not text.isascii() and _has_any(text, "‘’´“”")
+
+
+def _check_replace_latin_abbrevs(text):
+    # Every abbreviation form contains a full stop
+    return '.' in text
+
+
+def _check_remove_duplicate_sentencestops(text, stop_chars=".;!?:"):
+    if not _literal_chars(stop_chars):
+        return True
+    for c in stop_chars:
+        i = text.find(c)
+        if i >= 0 and text.find(c, i + 1) >= 0:
+            return True
+    return False
+
+
+def _is_arrow(x):
+    """ True for pyarrow arrays, only checked if pyarrow is already imported. """
+    pa = sys.modules.get('pyarrow')
+    return pa is not None and isinstance(x, (pa.Array, pa.ChunkedArray))
+
+
+def _is_missing(x):
+    """ True for None and float NaN (including pandas/numpy missing values). """
+    return x is None or (isinstance(x, float) and x != x)
+
+
 def vectorize(func, *args, **kwargs):
-    # Enable lists, Pandas Series, Numpy arrays
+    # Enable lists, tuples, Pandas Series, Numpy arrays and other iterables
     @wraps(func) # Need this to preserve function signatures and docstrings
     def wrapper(x, *args, **kwargs):
+        if isinstance(x, str):
+            return func(x, *args, **kwargs)
+
         if isinstance(x, list):
             return [func(i, *args, **kwargs) for i in x]
+
+        if isinstance(x, tuple):
+            return tuple(func(i, *args, **kwargs) for i in x)
+
+        # Only check for pandas and numpy types if they are already imported
+        pd = sys.modules.get('pandas')
+        if pd is not None and isinstance(x, pd.Series):
+            return x.map(lambda i: func(i, *args, **kwargs), na_action='ignore')
+
+        np = sys.modules.get('numpy')
+        if np is not None and isinstance(x, np.ndarray):
+            out = np.empty(x.shape, dtype=object)
+            for idx, i in np.ndenumerate(x):
+                out[idx] = i if _is_missing(i) else func(i, *args, **kwargs)
+            if x.dtype.kind == 'U':
+                return out.astype(str)
+            return out
+
+        if _is_arrow(x):
+            # Kernels over the whole array where the function has one, see texttidy.arrow
+            from texttidy.arrow import apply_step
+            return apply_step(func, x, *args, **kwargs)
+
+        if isinstance(x, Iterable) and not isinstance(x, (bytes, dict)):
+            # Generators and other iterables are cleaned lazily
+            return (func(i, *args, **kwargs) for i in x)
+
         return func(x, *args, **kwargs)
+    wrapper._vectorized = func
     return wrapper
 
 
+def _unvectorized(func):
+    """ The function wrapped by vectorize, for plans that handle lists themselves. Other decorators, e.g. of custom steps, are kept. """
+    inner = getattr(func, '_vectorized', None)
+    # functools.wraps copies the marker onto decorators of a vectorized function, but not __wrapped__
+    if inner is not None and getattr(func, '__wrapped__', None) is inner:
+        return inner
+    return func
+
+
+@register_step(collapses_whitespace=True, precheck=_check_single_space, idempotent=True)
 @vectorize
 def single_space(text):
     """ replace multiple whitespaces with a single space. """
-    rx = r"\s{2,}"
-    text = re.sub(rx, " ", text)
+    # A substitution without matches returns the text itself, so this needs no separate pre-check
+    text = _patterns().multispace.sub(" ", text)
     return text.strip()
 
 
+@register_step(precheck=_check_space_sentencestops, idempotent=True, preserves=('single_space',))
 @vectorize
 def space_sentencestops(text, stop_chars=".;!?,:"):
     """ Space end of sentence punctuation marks e.g. Bad stop.Good stop. --> Bad stop. Good stop. And remove spaces before end marks e.g. Bad .Good --> Bad. Good."""
-    # Add a single space after each stop character
-    for c in stop_chars:
-        rx = f"(\\{c}(?=[a-zA-Z]))"
-        text = re.sub(rx, f"{c} ", text)
-
-    # Remove the preceding space before a stop charater
-    rx = fr"((?<=[a-zA-Z0-9])\s{{1,}}(?=[{stop_chars}]))"
-    text = re.sub(rx, '', text)
+    if not _check_space_sentencestops(text, stop_chars):
+        return text
 
-    return text
+    # Add a single space after each stop character, then remove the spaces before one
+    return _sentencestop_spacer(stop_chars, backend.current_backend())(text)
 
 
+@register_step(edge='end', strips=True, precheck=_check_add_fullstop, preserves=('single_space',))
 @vectorize
 def add_fullstop(text, stop_chars='.?!', replace_chars=';:,-/'):
     """ Add a fullstop to the end of a string if it does not exist """
+    # The checks below are as cheap as the pre-check, which is only used by profiles
     text = text.strip()
-    if replace_chars is not None:
-        if text[-1] in replace_chars:
-            text = text[0:-1]
-            return add_fullstop(text, stop_chars=stop_chars, replace_chars=replace_chars)
+    if replace_chars and text and text[-1] in replace_chars:
+        # Trailing replace_chars are removed along with any whitespace between them
+        if not isinstance(replace_chars, str):
+            replace_chars = "".join(c for c in replace_chars if len(c) == 1)
+        text = text.rstrip(_fullstop_strip_chars(replace_chars))
     if text[-1] not in stop_chars:
         text+='.'
     return text
 
 
+@register_step(precheck=_check_remove_numerical_commas, idempotent=True, commutes=('single_space',))
 @vectorize
 def remove_numerical_commas(text):
     """ Remove commas from numerical numbers e.g. 1,000,000 --> 1000000 """
-    rx = r"((?<=\d)\,(?=\d))"
-    return re.sub(rx, "", text)
+    if not _check_remove_numerical_commas(text):
+        return text
+    return _patterns().numerical_comma.sub("", text)
 
 
+@register_step(precheck=_check_remove_dashes)
 @vectorize
 def remove_dashes(text):
     """ Remove dashes between acronym-styled words where the character preceding the dash is an upper-case letter and the character following the dash is either an upper-case letter or digit, e.g. COVID-19 --> COVID19. one-to-one --> one-to-one."""
-    # Replace all long dashes with short dashes everywhere
-    rx = r"\–"
-    text = re.sub(rx, "-", text)
-
-    # remove dashes between word and numbers
-    rx = r"((?<=[A-Z])\-(?=[A-Z|\d]))"
-    text = re.sub(rx, "", text)
-
-    # remove dashes seperated by white spaces. incl long and short dashes
-    rx = r"((?<=\s){1,}\-{1,}(?=\s){1,})"
-    text = re.sub(rx, "", text)
-
-    # space dashes that follow any non-whitespace and followed by a whitespace
-    # eg hello- world --> hello world
-    rx = r"((?<=[\S])\-(?=\s))"
-    text = re.sub(rx, "", text)
+    if not _check_remove_dashes(text):
+        return text
 
-    # Remove dashes at the start of a string
-    rx = r"(^\-(?=\s){1,})"
-    text = re.sub(rx, "", text)
+    # Replace all long dashes with short dashes everywhere
+    text = text.replace('–', '-')
 
-    # Remove dashes that follow a sentence stop
-    rx = r"((?<=[^a-zA-Z0-9])\-(?=[a-zA-Z|\d]))"
-    text = re.sub(rx, " ", text)
+    for rx, rpl in _patterns().dashes:
+        text = rx.sub(rpl, text)
     return text
 
 
+@register_step(precheck=_check_remove_bullets, implies=('space_sentencestops',))
 @vectorize
 def remove_bullets(text):
     """ Remove bullet characters and replace with fullstop. ●•·"""
-    bullets = ['○', '●', '•', '·']
-    s = "\\" + ("|\\").join(bullets)
+    if not _check_remove_bullets(text):
+        return text
 
     # Remove bullets at start of string and replace with space
     text = text.strip()
+    if not text.isascii():
+        if text[:1] in _BULLETS:
+            text = ' ' + text[1:]
 
-    rx = f"^({s})"
-    text = re.sub(rx, ' ', text)
-
-    # remove any other bullet and replace with fullstop
-    rx = f"{s}"
-    text = re.sub(rx, '.', text)
+        # remove any other bullet and replace with fullstop
+        text = _patterns().bullet.sub('.', text)
 
     text = text.strip()
     return space_sentencestops(text)
 
 
+@lru_cache(maxsize=16)
+def _token_replacer(values, regex_backend):
+    return TokenReplacer({k: list(v) for k, v in values})
+
+
 @vectorize
+def _apply_token_replacer(text, replacer):
+    return replacer(text)
+
+
+def _prepare_replace_tokens(kwargs):
+    """ Build the TokenReplacer of a replacement dictionary once, when a pipeline is compiled. """
+    values = kwargs.get('values')
+    if values is None or isinstance(values, TokenReplacer):
+        return kwargs
+    return {**kwargs, 'values': TokenReplacer(values)}
+
+
+@register_step(scope='paragraph', prepare=_prepare_replace_tokens)
 def replace_tokens(text, values):
-    """ Replace tokens as specified in a passed dictionary {k: [v1, v2, v]} where tokens v in the text will be replaced by token k. """
-    for k, v in values.items():
-        for i in v:
-            rx = rf"(^|(?<=[^\-]))(\b({i})\b)((?=[^\-])|$)"
-            text = re.sub(rx, k, text, flags=re.IGNORECASE)
+    """Replace tokens as specified in a passed dictionary {k: [v1, v2, v]} where tokens v in the text will be replaced by token k.
 
-    return text
+    Args:
+        text (str or list): text to be cleaned.
+        values (dict or TokenReplacer): replacement dictionary, or a TokenReplacer built from one. Prebuild a TokenReplacer for large dictionaries.
+
+    Returns:
+        str or list: cleaned text.
+    """
+    if not isinstance(values, TokenReplacer):
+        values = _token_replacer(tuple((k, tuple(v)) for k, v in values.items()), backend.current_backend())
+    return _apply_token_replacer(text, values)
 
 
+@register_step(scope='document', precheck=_check_remove_escapes, implies=('space_sentencestops',))
 @vectorize
 def remove_escapes(text):
     """ Remove escape characters and replace with fullstop except if the escape is at the start of a string. """
-    escapes = ['\\n', '\\t', '\\r']
-    text = text.strip()
-    for escape in escapes:
-        rx = f"^{escape}"
-        text = re.sub(rx, ' ', text)
-
-    for escape in escapes:
-        rx = f"{escape}"
-        text = re.sub(rx, '. ', text)
+    if not _check_remove_escapes(text):
+        return text
 
+    # Escapes at the start (and end) of the string are removed by the strip, so the others are all
+    # between non-whitespace characters
     text = text.strip()
+    text = _patterns().escapes.sub('. ', text)
     return space_sentencestops(text)
 
 
-@vectorize
-def replace_contractions(text):
-    """ Replace common contractions (e.g. don't) with full form (e.g. do not). The list of contractions have been derived from wikipedia (see: List of English contractions)."""
-    rx_compiled = []
-    for k, v in config.CONTRACTIONS.items():
-        s = k
+@backend.per_backend
+def _contraction_matcher(compile):
+    """ Build the contraction lookup table and token pattern once per regex backend, on first use. """
+    lookup = {}
+    alternatives = []
+    for i, (k, v) in enumerate(config.CONTRACTIONS.items()):
+        forms = [k]
         if k.lower() not in config.CONTRACTIONS_EXCEPTIONS:
-            s1 = k.replace("'", "")
-            s += f"|{s1}"
+            forms.append(k.replace("'", ""))
 
-        # sub exact matches
-        rx = re.compile(rf"((?<=\s)|^)({s})((?=\s)|$)", flags=re.IGNORECASE)
-        rx_compiled.append((rx, v))
+        # Earlier entries win, as they did when each entry was a separate pass
+        for form in forms:
+            lookup.setdefault(form.lower(), v)
+        alternatives.append(f"(?P<c{i}>{'|'.join(re.escape(f) for f in forms)})")
 
-    for rx, rpl in rx_compiled:
-        text = rx.sub(rpl, text)
+    # Whitespace delimited tokens, equivalent to ((?<=\s)|^)(...)((?=\s)|$)
+    rx_token = compile(r"(?<!\S)\S+")
+
+    # Exact case-insensitive fallback for non-ascii tokens, where str.lower()
+    # and re.IGNORECASE can disagree (e.g. long s or the kelvin sign)
+    rx_exact = compile("|".join(alternatives), re.IGNORECASE)
+    replacements = list(config.CONTRACTIONS.values())
+
+    def replace(match):
+        token = match.group()
+        rpl = lookup.get(token.lower())
+        if rpl is not None:
+            return rpl
+        if not token.isascii():
+            m = rx_exact.fullmatch(token)
+            if m is not None:
+                return replacements[int(m.lastgroup[1:])]
+        return token
+
+    return rx_token, replace
 
-    return text
+
+@register_step
+@vectorize
+def replace_contractions(text):
+    """ Replace common contractions (e.g. don't) with full form (e.g. do not). The list of contractions have been derived from wikipedia (see: List of English contractions)."""
+    rx, replace = _contraction_matcher()
+    return rx.sub(replace, text)
 
 
+@register_step(precheck=_check_clean_quote_chars, idempotent=True, commutes=('single_space', 'remove_numerical_commas'))
 @vectorize
 def clean_quote_chars(text):
     """ Simplify usage of quotations and single apostraphies including (‘ ’ ´) and (“ ”) """
-    rx = r"[‘’´]"
-    text = re.sub(rx, "'", text)
-
-    rx = r"[“”]"
-    text = re.sub(rx, '"', text)
-    return text
+    if text.isascii() or not _has_any(text, "‘’´“”"):
+        return text
+    rx = _patterns()
+    text = rx.single_quotes.sub("'", text)
+    return rx.double_quotes.sub('"', text)
 
 
+@register_step(precheck=_check_replace_latin_abbrevs, idempotent=True, preserves=('single_space',))
 @vectorize
 def replace_latin_abbrevs(text):
     """ Replace Latin abbreviations (eg, ie, and NB) with tidier forms (such as: (e.g.|e. g.|e.g) --> eg)"""
-    rx = r"((?<=\s)|^)(e\.g\.|e\. g\.|e\.g)((?=\s)|$)"
-    text = re.sub(rx, "eg", text, flags=re.IGNORECASE)
-
-    rx = r"((?<=\s)|^)(i\.e\.|i\. e\.|i\.e)((?=\s)|$)"
-    text = re.sub(rx, "ie", text, flags=re.IGNORECASE)
+    if not _check_replace_latin_abbrevs(text):
+        return text
 
-    rx = r"((?<=\s)|^)(n\.b\.|n\. b\.|n\.b)((?=\s)|$)"
-    text = re.sub(rx, "nb", text, flags=re.IGNORECASE)
-    return text
+    # The three abbreviations cannot overlap, so replace them in a single pass
+    return _patterns().latin_abbrevs.sub(lambda m: _LATIN_ABBREVS[m.lastindex - 1], text)
 
 
+@register_step(collapses_whitespace=True, implies=('single_space',))
 @vectorize
 def remove_pronouns(text, pronouns='default'):
     """ Remove pronouns from text """
-    if pronouns=='default':
-        pronouns = config.PRONOUNS
-
-    else:
+    if pronouns!='default':
         if not isinstance(pronouns, list):
             arg_type = type(pronouns)
             raise TypeError(f"pronouns arguement expecting a list but received {arg_type}")
+        pronouns = tuple(pronouns)
 
-    s = "|".join(pronouns)
-    rx = re.compile(rf"\b({s})\b", flags=re.IGNORECASE)
+    rx = _pronoun_pattern(pronouns, backend.current_backend())
     text = rx.sub('', text)
 
     return single_space(text)
 
 
+@lru_cache(maxsize=32)
+def _punctuation_replacer(remove, keep, regex_backend):
+    """ Translation table and equivalent character class pattern replacing each character in remove (but not in keep) with a space. """
+    chars = "".join(c for c in remove if c not in keep)
+    table = str.maketrans(dict.fromkeys(chars, ' '))
+    rx = backend.compile(f"[{re.escape(chars)}]") if chars else None
+    return table, rx
+
+
+@register_step(collapses_whitespace=True, implies=('single_space',))
 @vectorize
 def remove_punctuation(text, remove='all', keep='.,?!()%&'):
     """Remove all punctuation except those marked keep
@@ -222,26 +491,43 @@ def remove_punctuation(text, remove='all', keep='.,?!()%&'):
     if remove=='all':
         remove = config.PUNCT_ALL
 
+    # str.translate is fastest on ascii text, a single regex pass on anything else
+    table, rx = _punctuation_replacer(remove, keep, backend.current_backend())
+    if text.isascii():
+        text = text.translate(table)
+    elif rx is not None:
+        text = rx.sub(" ", text)
+    return single_space(text)
 
-    chars = ''
-    for c in remove:
-        if not c in keep:
-            chars+=c
 
-    for c in chars:
-        rx = f"(\\{c})"
-        text = re.sub(rx, " ", text)
+def _is_token_char(c):
+    """ Equivalent to the regex [\\w\\-]. """
+    return c.isalnum() or c == '_' or c == '-'
 
-    return single_space(text)
 
+def _has_digit(token):
+    """ Equivalent to searching for the regex \\d. """
+    return any(c.isdecimal() for c in token)
 
+
+def _strip_span(text, start, end):
+    """ Span of text[start:end].strip() within text. """
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+@register_step(edge='both', edge_kwargs={'start': {'from_end': False}, 'end': {'from_start': False}},
+               edge_defaults=('from_start', 'from_end', 'trim_punc'))
 @vectorize
 def strip_stopwords(text, stopwords, from_start=True, from_end=True, remove_numeric_tokens=False, trim_punc=True):
     """Remove stopwords from text string.
 
     Args:
         text (str or list): text to be cleaned.
-        stopwords (list): list of stopwords to be removed
+        stopwords (list or set): stopwords to be removed. Pass a (frozen)set to avoid converting the list on every call.
         from_start (bool, optional): Remove only stopwords from the start of text - continue until a non-stopword is found. Defaults to True.
         from_end (bool, optional): Remove only stopwords from the end of text - continue until a non-stopword is found. Defaults to True.
         remove_numeric_tokens (bool, optional): Remove any token that contains one or more digits from the start or end.
@@ -251,53 +537,47 @@ def strip_stopwords(text, stopwords, from_start=True, from_end=True, remove_nume
         str or list: cleaned text.
     """
 
-    if text=="":
-        return text
+    if not isinstance(stopwords, (set, frozenset)):
+        stopwords = frozenset(stopwords)
 
-    re_hasdigits = re.compile(r"\d")
+    # Walk inward from both edges over the original string and slice once at the end
+    start, end = 0, len(text)
+    while start < end:
+        if from_start:
+            if trim_punc and not text[start].isalnum():
+                start, end = _strip_span(text, start + 1, end)
+                continue
 
-    if from_start:
-        if trim_punc:
-            # Dont use built in punct and check for non-alphanumeric chars instead.
-            if not text[0].isalnum():
-                text = text[1:].strip()
-                return strip_stopwords(text, stopwords, from_start=from_start, from_end=from_end, remove_numeric_tokens=remove_numeric_tokens, trim_punc=trim_punc)
+            i = start
+            while i < end and _is_token_char(text[i]):
+                i += 1
+            token = text[start:i]
 
-        rx = r"^([\w\-]+)"
-        match = re.findall(rx, text)[0]
+            if token and ((remove_numeric_tokens and _has_digit(token)) or token.lower() in stopwords):
+                start, end = _strip_span(text, i, end)
+                continue
 
-        if remove_numeric_tokens:
-            if re_hasdigits.search(match) is not None:
-                text = text.replace(match, "", 1).strip()
-                return strip_stopwords(text, stopwords, from_start=from_start, from_end=from_end, remove_numeric_tokens=remove_numeric_tokens, trim_punc=trim_punc)
+        if from_end:
+            if trim_punc and not text[end - 1].isalnum():
+                start, end = _strip_span(text, start, end - 1)
+                continue
 
-        if match.lower() in stopwords:
-            text = text.replace(match, "", 1).strip()
-            return strip_stopwords(text, stopwords, from_start=from_start, from_end=from_end, remove_numeric_tokens=remove_numeric_tokens, trim_punc=trim_punc)
+            # A trailing newline is skipped over, as by the regex "$" this replaces
+            j = tail = end - 1 if text[end - 1] == '\n' else end
+            while j > start and _is_token_char(text[j - 1]):
+                j -= 1
+            token = text[j:tail]
 
-    if from_end:
-        if trim_punc:
-            # Dont use built in punct and check for non-alphanumeric chars instead.
-            if not text[-1].isalnum():
-                text = text[:-1].strip()
-                return strip_stopwords(text, stopwords, from_start=from_start, from_end=from_end, remove_numeric_tokens=remove_numeric_tokens, trim_punc=trim_punc)
+            if token and ((remove_numeric_tokens and _has_digit(token)) or token.lower() in stopwords):
+                start, end = _strip_span(text, start, j)
+                continue
 
-        rx = r"([\w\-]+)$"
-        rx_match = re.finditer(rx, text)
-        match, idx = [(x.group(0), x.start()) for x in rx_match][0]
+        break
 
-        if remove_numeric_tokens:
-            if re_hasdigits.search(match) is not None:
-                text = text.replace(match, "", 1).strip()
-                return strip_stopwords(text, stopwords, from_start=from_start, from_end=from_end, remove_numeric_tokens=remove_numeric_tokens, trim_punc=trim_punc)
-
-        if match.lower() in stopwords:
-            text = text[:idx].strip()
-            return strip_stopwords(text, stopwords, from_start=from_start, from_end=from_end, remove_numeric_tokens=remove_numeric_tokens, trim_punc=trim_punc)
-
-    return text
+    return text[start:end]
 
 
+@register_step(precheck=_check_remove_duplicate_sentencestops, idempotent=True, preserves=('single_space',))
 @vectorize
 def remove_duplicate_sentencestops(text, stop_chars=".;!?:"):
     """Remove duplicate sentence stops eg hello world... --> hello world.
@@ -306,14 +586,9 @@ def remove_duplicate_sentencestops(text, stop_chars=".;!?:"):
         text (str or list): text to be cleaned.
         stop_chars (str, optional): Sentence stop characters to check for duplicates. Defaults to ".;!?:".
     """
-    # First remove spaces between duplicates stop characters
-    # eg hello . . world --> hello .. world
-    for c in stop_chars:
-        rx = f"(?<=\\{c})\s(?=\\{c})"
-        text = re.sub(rx, "", text)
+    if not _check_remove_duplicate_sentencestops(text, stop_chars):
+        return text
 
-    # Then remove duplicates (if 2 or more consequtive)
-    for c in stop_chars:
-        rx = f"\\{c}{{2,}}"
-        text = re.sub(rx, f"{c}", text)
-    return text
+    # Remove spaces between duplicate stop characters and then the duplicates, in a single pass
+    # eg hello . . world --> hello .. world --> hello . world
+    return _duplicate_stop_remover(stop_chars, backend.current_backend())(text)
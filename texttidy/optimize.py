@@ -0,0 +1,94 @@
+""" Removal of redundant pipeline steps, based on the step properties declared with register_step """
+
+from texttidy.cache import canonical_json
+from texttidy.registry import default_kwargs, get_step_meta
+
+
+def _is_default(func, kwargs):
+    """ True if kwargs only spell out defaults of func. """
+    defaults = default_kwargs(func)
+    for k, v in kwargs.items():
+        if k not in defaults:
+            return False
+        d = defaults[k]
+        # e.g. a list given for a tuple default
+        if v is not d and v != d and canonical_json(v) != canonical_json(d):
+            return False
+    return True
+
+
+def _keeps(step, meta, other):
+    """ True if a step with the given metadata never undoes the step named other. """
+    return other in meta.get('preserves', ()) or other in meta.get('commutes', ()) or step in get_step_meta(other).get('commutes', ())
+
+
+def optimize_steps(steps):
+    """Drop steps that cannot change the output of the steps before them.
+
+    A step is dropped when an earlier step already left the text unchanged by it (the same idempotent
+    step, or a step that implies it), and every step in between preserves or commutes with it. Step
+    properties are only relied on for steps with default kwargs, see register_step. Edge steps are
+    not relied on, as segment plans can skip them.
+
+    Args:
+        steps (list): (step name, function, kwargs) tuples.
+
+    Returns:
+        tuple: (kept, changes), the steps that are kept and one dictionary per dropped step, with the index of the step, its name and the index of the step that makes it redundant.
+    """
+    kept = []
+    changes = []
+
+    # Step name -> index of the step after which the text is unchanged by that step with default kwargs
+    fixed = {}
+    for i, (step, func, kwargs) in enumerate(steps):
+        default = _is_default(func, kwargs)
+        if default and step in fixed:
+            by = fixed[step]
+            reason = "repeats" if steps[by][0] == step else "implied by"
+            changes.append({'index': i, 'step': step, 'action': 'drop', 'reason': f"{reason} step {by} ({steps[by][0]})", 'by': by})
+            continue
+        kept.append((step, func, kwargs))
+
+        if not default:
+            fixed = {}
+            continue
+
+        meta = get_step_meta(step)
+        fixed = {other: by for other, by in fixed.items() if _keeps(step, meta, other)}
+        if meta.get('edge'):
+            continue
+        if meta.get('idempotent'):
+            fixed[step] = i
+        for other in meta.get('implies', ()):
+            fixed[other] = i
+
+    return kept, changes
+
+
+def verify(reference, optimized, texts):
+    """Check that an optimized plan returns the same output as the reference on a sample of texts.
+
+    Args:
+        reference (callable): Unoptimized pipeline, taking a string.
+        optimized (callable): Optimized pipeline, taking a string.
+        texts (iterable): Sample corpus.
+
+    Returns:
+        dict: number of texts checked and the (text, expected, output) of every text with a different output.
+    """
+    n = 0
+    mismatches = []
+    for text in texts:
+        n += 1
+        try:
+            expected = reference(text)
+        except Exception as e:
+            expected = e.__class__
+        try:
+            output = optimized(text)
+        except Exception as e:
+            output = e.__class__
+        if output != expected:
+            mismatches.append((text, expected, output))
+    return {'texts': n, 'mismatches': mismatches}
@@ -0,0 +1,256 @@
+""" Multi-process execution of pipelines over large collections of text """
+
+import itertools
+import json
+import os
+import shutil
+from collections import OrderedDict, deque
+
+from texttidy.cache import canonical_json
+
+
+# Compiled pipeline of the current worker process, built once by _init_worker
+_worker_pipeline = None
+
+# Compiled pipelines of the current process for run_batch, keyed by definition. The least
+# recently used is dropped beyond _BATCH_PIPELINES_MAXSIZE.
+_batch_pipelines = OrderedDict()
+_BATCH_PIPELINES_MAXSIZE = 32
+
+
+def _compile(pipe):
+    from texttidy.pipe import Pipeline
+    if isinstance(pipe, dict):
+        pipe = Pipeline(pipe=pipe)
+    if isinstance(pipe, Pipeline):
+        return pipe._compiled
+    return pipe
+
+
+def _init_worker(pipe):
+    global _worker_pipeline
+    _worker_pipeline = _compile(pipe)
+
+
+def _run_chunk(chunk):
+    return [_worker_pipeline(t) for t in chunk]
+
+
+def run_batch(pipe, texts):
+    """Clean a list of texts with a pipeline. Meant to be submitted to process pools.
+
+    Args:
+        pipe (dict, Pipeline or CompiledPipeline): Pipeline definition or pipeline. Definitions are compiled once per process.
+        texts (list): Strings to clean.
+
+    Returns:
+        list: cleaned texts.
+    """
+    if isinstance(pipe, dict):
+        key = canonical_json(pipe)
+        compiled = _batch_pipelines.get(key)
+        if compiled is None:
+            compiled = _batch_pipelines[key] = _compile(pipe)
+            if len(_batch_pipelines) > _BATCH_PIPELINES_MAXSIZE:
+                _batch_pipelines.popitem(last=False)
+        else:
+            _batch_pipelines.move_to_end(key)
+    else:
+        compiled = _compile(pipe)
+    return [compiled(t) for t in texts]
+
+
+def _chunks(iterable, chunksize):
+    it = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(it, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_parallel(pipe, texts, workers=None, chunksize=256, serial_threshold=1000):
+    """Clean texts with a pipeline across a pool of worker processes.
+
+    The pipeline definition is sent to each worker once, when the worker starts. Texts are
+    sent in chunks and only a few chunks per worker are in flight at any time, so memory
+    stays bounded for long or lazy inputs.
+
+    Args:
+        pipe (dict, Pipeline or CompiledPipeline): Pipeline definition (e.g. texttidy.FULLMONTY) or pipeline. Pipelines are pickled through the step registry, so custom steps are available in the workers.
+        texts (iterable): Strings to clean. Can be a generator.
+        workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+        chunksize (int, optional): Number of texts sent to a worker at a time. Defaults to 256.
+        serial_threshold (int, optional): Inputs with fewer texts than this are cleaned in the current process, where pool startup would cost more than it saves. Defaults to 1000.
+
+    Yields:
+        str: cleaned texts, in input order.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    it = iter(texts)
+    head = list(itertools.islice(it, serial_threshold))
+
+    if workers < 2 or len(head) < serial_threshold:
+        compiled = _compile(pipe)
+        for t in itertools.chain(head, it):
+            yield compiled(t)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunks = _chunks(itertools.chain(head, it), chunksize)
+    max_pending = workers * 2
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(pipe,)) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_run_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _shards(path, shard_size):
+    """ Byte ranges of about shard_size bytes, each ending just after a newline (or at the end of the file). """
+    import mmap
+
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+
+    shards = []
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        while start < size:
+            end = mm.find(b'\n', min(start + shard_size, size) - 1)
+            end = size if end < 0 else end + 1
+            shards.append((start, end))
+            start = end
+    return shards
+
+
+def _clean_shard(path, start, end, out_path, compiled=None):
+    """ Clean the lines of one byte range of a file into out_path, then write a done marker next to it. """
+    import mmap
+
+    compiled = compiled or _worker_pipeline
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        text = mm[start:end].decode('utf-8')
+
+    lines = text.split('\n')
+    if text.endswith('\n'):
+        lines.pop()
+
+    # Written to a temporary file first, so that a crash never leaves a partial shard behind
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', newline='\n') as out:
+        for line in lines:
+            line = line.rstrip('\r')
+            # Blank lines are written unchanged, as by the command line cleaner
+            out.write((compiled(line) if line.strip() else line) + '\n')
+    os.replace(tmp_path, out_path)
+
+    progress = {'lines': len(lines), 'bytes': end - start}
+    with open(out_path + '.done', 'w') as marker:
+        json.dump(progress, marker)
+    return progress
+
+
+def _load_manifest(shard_dir, manifest):
+    """ Shards of an earlier run over the same input with the same pipeline, or None. """
+    try:
+        with open(os.path.join(shard_dir, 'manifest.json')) as file:
+            previous = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if {k: v for k, v in previous.items() if k != 'shards'} != manifest:
+        return None
+    return [tuple(s) for s in previous['shards']]
+
+
+def clean_file(pipe, path, output, workers=None, shard_size=1 << 26, merge=True, resume=True):
+    """Clean a newline-delimited text file in parallel, one line per text.
+
+    The input is memory-mapped and split into shards of about shard_size bytes that end on a line
+    boundary. Worker processes clean whole shards and write one output file per shard, and a done
+    marker once it is complete. A run that is interrupted can be resumed: shards with a marker are
+    not cleaned again, as long as the input file and pipeline have not changed.
+
+    Shards are written to the output directory, or when merging, to "<output>.shards", which is
+    removed once the shards are merged into the output file in order. Blank lines are written
+    unchanged and line endings are written as newlines.
+
+    Args:
+        pipe (dict or Pipeline): Pipeline definition (e.g. texttidy.FULLMONTY) or pipeline.
+        path (str): Input file, utf-8 encoded.
+        output (str): Output file, or output directory if merge is False.
+        workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+        shard_size (int, optional): Approximate shard size in bytes. Each worker holds about three times this in memory. Defaults to 67108864 (64MB).
+        merge (bool, optional): Merge the shards into a single output file. Defaults to True.
+        resume (bool, optional): Reuse the shards completed by an earlier run. Defaults to True.
+
+    Returns:
+        dict: number of shards, shards reused from an earlier run, lines and bytes read.
+    """
+    from texttidy.pipe import Pipeline
+
+    if isinstance(pipe, dict):
+        pipe = Pipeline(pipe=pipe)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    shard_dir = output + '.shards' if merge else output
+    os.makedirs(shard_dir, exist_ok=True)
+
+    stat = os.stat(path)
+    manifest = {
+        'input': os.path.abspath(path),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'fingerprint': pipe.fingerprint,
+        'shard_size': shard_size,
+    }
+    shards = _load_manifest(shard_dir, manifest) if resume else None
+    if shards is None:
+        shards = _shards(path, shard_size)
+        for name in os.listdir(shard_dir):
+            if name.startswith('part-'):
+                os.remove(os.path.join(shard_dir, name))
+        with open(os.path.join(shard_dir, 'manifest.json'), 'w') as file:
+            json.dump({**manifest, 'shards': shards}, file)
+
+    parts = [os.path.join(shard_dir, f'part-{i:05d}.txt') for i in range(len(shards))]
+    progress = {}
+    for i, part in enumerate(parts):
+        if os.path.exists(part + '.done'):
+            with open(part + '.done') as marker:
+                progress[i] = json.load(marker)
+    stats = {'shards': len(shards), 'resumed': len(progress)}
+
+    pending = [i for i in range(len(shards)) if i not in progress]
+    if workers < 2 or len(pending) < 2:
+        compiled = _compile(pipe)
+        for i in pending:
+            progress[i] = _clean_shard(path, *shards[i], parts[i], compiled)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(pipe,)) as executor:
+            futures = {i: executor.submit(_clean_shard, path, *shards[i], parts[i]) for i in pending}
+            for i, future in futures.items():
+                progress[i] = future.result()
+
+    stats['lines'] = sum(p['lines'] for p in progress.values())
+    stats['bytes'] = sum(p['bytes'] for p in progress.values())
+
+    if merge:
+        with open(output, 'wb') as out:
+            for part in parts:
+                with open(part, 'rb') as file:
+                    shutil.copyfileobj(file, out)
+        shutil.rmtree(shard_dir)
+    return stats
@@ -1,14 +1,144 @@
 
-import inspect
+import importlib
 import json
+import time
+from collections.abc import Iterator
+from functools import partial
 
-from tqdm import tqdm
+from texttidy import backend
+from texttidy.cache import PipelineCache, pipeline_fingerprint
+from texttidy.dedup import DedupStats, dedup_map
+from texttidy.functions import _is_arrow, _unvectorized, vectorize
+from texttidy.optimize import optimize_steps, verify
+from texttidy.parallel import run_parallel
+from texttidy.profiling import PipelineProfile
+from texttidy.registry import get_step, get_step_meta
 
-import texttidy
+
+def _step_modules(funcs):
+    """ Modules that register the given step functions, imported before resolving steps after unpickling. """
+    return tuple(sorted({f.__module__ for f in funcs}))
+
+
+def _load_compiled(pipe, modules, regex_backend=None):
+    for module in modules:
+        importlib.import_module(module)
+    return Pipeline(pipe=pipe, regex_backend=regex_backend).compile()
+
+
+class CompiledPipeline:
+    """Execution plan produced by Pipeline.compile(). Steps are bound to their kwargs and called without the list handling of the public functions.
+
+    A plan pickles as its pipeline definition plus the modules that register its steps, and is rebuilt
+    through the step registry when unpickled. Profiling and caching are not carried over.
+    """
+    def __init__(self, plan, pipe=None, modules=()):
+        self.steps = [name for name, _ in plan]
+        self._funcs = tuple(func for _, func in plan)
+        self._run = vectorize(self.__call__)
+        self._source = (pipe, modules)
+
+
+    def __reduce__(self):
+        return (_load_compiled, self._source)
+
+
+    def __call__(self, text):
+        for func in self._funcs:
+            text = func(text)
+        return text
+
+
+    def run(self, text):
+        """ Run the plan over a string or any of the containers supported by the cleaning functions. """
+        return self._run(text)
+
+
+class ProfiledPipeline(CompiledPipeline):
+    """ Execution plan that records per-step statistics in a PipelineProfile. Steps with a pre-check are only called when it passes, and skips are counted. """
+    def __init__(self, plan, profile, pipe=None, modules=(), checks=None):
+        super().__init__(plan, pipe, modules)
+        self.profile = profile
+        self._checks = tuple(checks) if checks is not None else (None,) * len(self._funcs)
+
+
+    def __call__(self, text):
+        stats = []
+        for func, check in zip(self._funcs, self._checks):
+            start = time.perf_counter()
+            skipped = check is not None and not check(text)
+            out = text if skipped else func(text)
+            elapsed = time.perf_counter() - start
+            stats.append([elapsed, 1, len(text), len(out), out != text, skipped])
+            text = out
+        self.profile.record(stats)
+        return text
+
+
+class CachedPipeline(CompiledPipeline):
+    """ Execution plan that looks up results in a PipelineCache before running the wrapped plan. fingerprint is called for the pipeline fingerprint, which depends on the regex backend in use. """
+    def __init__(self, compiled, cache, fingerprint):
+        self.steps = compiled.steps
+        self._source = compiled._source
+        self.cache = cache
+        self._fingerprint = fingerprint
+        self._compiled = compiled
+        self._run = vectorize(self.__call__)
+
+
+    @property
+    def fingerprint(self):
+        return self._fingerprint()
+
+
+    def __call__(self, text):
+        key = self.cache.key(self._fingerprint(), text)
+        out = self.cache.get(key)
+        if out is None:
+            out = self._compiled(text)
+            self.cache.set(key, out)
+        return out
+
+
+class BackendPipeline(CompiledPipeline):
+    """ Execution plan that runs the wrapped plan with the given regex backend, see texttidy.backend. """
+    def __init__(self, compiled, regex_backend):
+        self.steps = compiled.steps
+        self._source = compiled._source + (regex_backend,)
+        self.regex_backend = regex_backend
+        self._compiled = compiled
+        self._run = vectorize(self.__call__)
+
+
+    def __call__(self, text):
+        token = backend._current.set(self.regex_backend)
+        try:
+            return self._compiled(text)
+        finally:
+            backend._current.reset(token)
 
 
 class Pipeline:
-    def __init__(self, text=None, pipe=None, verbose=False):
+    """Sequence of text cleaning steps.
+
+    Build once and call as pipe(text), pipe.transform(texts) or pipe.transform_batch(texts). These
+    do not modify the pipeline, so a single instance can be shared between threads. run() keeps
+    the original behaviour of cleaning self.text_input into self.text_output.
+
+    Set cache to True (or pass a PipelineCache, e.g. with an on-disk tier) to reuse the output of
+    texts that have been cleaned before. Cache keys include a fingerprint of the pipeline
+    definition, so a cache can be shared between different pipelines.
+
+    Set dedup to True to clean each distinct text of a list or batch only once. Inputs are
+    deduplicated in windows of dedup_window texts, and the counts are kept in self.dedup_stats.
+
+    Set regex_backend (e.g. "regex") to run this pipeline's steps with another regex engine than
+    the global one, see texttidy.backend.
+    """
+    def __init__(self, text=None, pipe=None, verbose=False, profile=False, cache=None, dedup=False, dedup_window=65536, regex_backend=None):
+        if regex_backend is not None and regex_backend not in backend.available_backends():
+            raise ValueError(f"Regex backend '{regex_backend}' is not available, expecting one of {backend.available_backends()}.")
+        self.regex_backend = regex_backend
         self.pipe = pipe
         self.text_input = text
         self.steps = None
@@ -17,6 +147,66 @@ class Pipeline:
         self._steps = self._evaluate_steps()
         self._verbose = verbose
         self.text_output = None
+        self.profile = PipelineProfile(self.steps) if profile else None
+        self._fingerprints = {}
+        if cache is True:
+            cache = PipelineCache()
+        elif cache is False:
+            cache = None
+        self.cache = cache
+        self.dedup = dedup
+        self.dedup_window = dedup_window
+        self.dedup_stats = DedupStats() if dedup else None
+        self._plan = None
+
+
+    @property
+    def _compiled(self):
+        """ Execution plan, compiled on first use so that building or unpickling a pipeline stays cheap. """
+        plan = self._plan
+        if plan is None:
+            plan = self.compile(profile=self.profile)
+            if self.cache is not None:
+                plan = CachedPipeline(plan, self.cache, lambda: self.fingerprint)
+            self._plan = plan
+        return plan
+
+
+    @property
+    def fingerprint(self):
+        """ Hash of the normalised pipeline definition and the regex backend it runs with, see cache.pipeline_fingerprint. """
+        regex_backend = self.regex_backend or backend.current_backend()
+        fingerprint = self._fingerprints.get(regex_backend)
+        if fingerprint is None:
+            fingerprint = self._fingerprints[regex_backend] = pipeline_fingerprint(self.steps, self._steps, self._kwargs, regex_backend)
+        return fingerprint
+
+
+    def __call__(self, text):
+        """ Clean a string (or a list, Series, array or iterable of strings). Iterators are cleaned lazily, one text at a time. """
+        if self.dedup and isinstance(text, list):
+            return self.transform_batch(text)
+        if self.dedup and isinstance(text, Iterator):
+            return self.transform(text)
+        if not isinstance(text, str) and _is_arrow(text):
+            return self.run_arrow(text)
+        return self._compiled.run(text)
+
+
+    def transform(self, texts):
+        """ Lazily clean an iterable of strings, yielding one cleaned string at a time. """
+        compiled = self._compiled
+        if self.dedup:
+            return dedup_map(compiled, texts, self.dedup_window, self.dedup_stats)
+        return (compiled(t) for t in texts)
+
+
+    def transform_batch(self, texts):
+        """ Clean a batch of strings and return them as a list. """
+        compiled = self._compiled
+        if self.dedup:
+            return list(dedup_map(compiled, texts, self.dedup_window, self.dedup_stats))
+        return [compiled(t) for t in texts]
 
 
     def _get_steps_params(self):
@@ -37,13 +227,184 @@ class Pipeline:
 
 
     def _evaluate_steps(self):
-        eval_steps = []
-        for step in self.steps:
-            try:
-                eval_steps.append(eval(f"texttidy.{step}"))
-            except:
-                raise TypeError(f"'{step}' not recognised in function list.")
-        return eval_steps
+        return [get_step(step) for step in self.steps]
+
+
+    def __getstate__(self):
+        # Functions are looked up again in the registry, caches and profiles stay with this instance
+        state = self.__dict__.copy()
+        for k in ('_steps', '_plan', 'profile', 'cache', 'dedup_stats'):
+            state.pop(k, None)
+        state['_step_modules'] = _step_modules(self._steps)
+        return state
+
+
+    def __setstate__(self, state):
+        for module in state.pop('_step_modules'):
+            importlib.import_module(module)
+        state.setdefault('regex_backend', None)
+        state.pop('_fingerprint', None)
+        state.setdefault('_fingerprints', {})
+        self.__dict__.update(state)
+        self.profile = None
+        self.cache = None
+        self.dedup_stats = DedupStats() if self.dedup else None
+        self._steps = self._evaluate_steps()
+        self._plan = None
+
+
+    def _prepare_steps(self, steps):
+        """ Steps with their kwargs as bound in a plan, see the prepare metadata of register_step. Run with the pipeline's regex backend. """
+        prepared = []
+        with backend.use_backend(self.regex_backend):
+            for step, func, kwargs in steps:
+                prepare = get_step_meta(step).get('prepare')
+                if prepare is not None:
+                    kwargs = prepare(kwargs)
+                prepared.append((step, func, kwargs))
+        return prepared
+
+
+    def _fuse_steps(self):
+        """ Drop steps that cannot change the output of the steps before them (see optimize.optimize_steps), and prepare the kwargs of the others. """
+        return self._prepare_steps(optimize_steps(list(zip(self.steps, self._steps, self._kwargs)))[0])
+
+
+    def optimize(self, sample=None):
+        """Report the steps that compile() drops because they cannot change the output, see optimize.optimize_steps.
+
+        Args:
+            sample (iterable, optional): Texts on which to check that the compiled plan returns the same output as running every step in turn. Defaults to None (no check).
+
+        Returns:
+            dict: number of steps before and after, the dropped steps with the reason, and with a sample, the number of texts checked and the (text, expected, output) of any mismatch.
+        """
+        steps = list(zip(self.steps, self._steps, self._kwargs))
+        kept, changes = optimize_steps(steps)
+        report = {'steps': len(steps), 'optimized_steps': len(kept), 'changes': changes}
+        if sample is not None:
+            reference = CompiledPipeline([(step, partial(_unvectorized(func), **kwargs)) for step, func, kwargs in steps])
+            with backend.use_backend(self.regex_backend):
+                report.update(verify(reference, self.compile(), sample))
+        return report
+
+
+    def compile(self, profile=None):
+        """Compile the pipeline into a reusable execution plan.
+
+        Redundant steps are dropped (see optimize) and each step is bound to its kwargs, so that
+        running the plan involves no per-call setup. The plan returns the same output as run().
+
+        Args:
+            profile (PipelineProfile, optional): Record per-step statistics in this profile. Steps are not dropped when profiling. Defaults to None.
+
+        Returns:
+            CompiledPipeline: callable taking a string (or list of strings via .run()).
+        """
+        compiled = self._compile_plan(profile)
+        if self.regex_backend is not None:
+            compiled = BackendPipeline(compiled, self.regex_backend)
+        return compiled
+
+
+    def _compile_plan(self, profile):
+        if profile is not None:
+            steps = self._prepare_steps(zip(self.steps, self._steps, self._kwargs))
+        else:
+            steps = self._fuse_steps()
+
+        plan = []
+        checks = []
+        for step, func, kwargs in steps:
+            # Call the undecorated function, the plan handles lists itself
+            func = _unvectorized(func)
+            check = get_step_meta(step).get('precheck')
+            if kwargs:
+                func = partial(func, **kwargs)
+                if check is not None:
+                    check = partial(check, **kwargs)
+            plan.append((step, func))
+            checks.append(check)
+
+        modules = _step_modules(self._steps)
+        if profile is not None:
+            return ProfiledPipeline(plan, profile, self.pipe, modules, checks)
+        return CompiledPipeline(plan, self.pipe, modules)
+
+
+    def run_parallel(self, texts, workers=None, chunksize=256, serial_threshold=1000):
+        """Run the pipeline over many texts using a pool of worker processes.
+
+        Args:
+            texts (iterable): Strings to clean. Can be a generator.
+            workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+            chunksize (int, optional): Number of texts sent to a worker at a time. Defaults to 256.
+            serial_threshold (int, optional): Inputs with fewer texts than this are run in the current process. Defaults to 1000.
+
+        Returns:
+            generator: cleaned texts, in input order.
+        """
+        return run_parallel(self, texts, workers=workers, chunksize=chunksize, serial_threshold=serial_threshold)
+
+
+    def run_arrow(self, arr):
+        """Clean a pyarrow string array (or chunked array). Requires pyarrow.
+
+        Steps that are regex replacements, strips or translations run as pyarrow.compute kernels
+        on the whole array, other steps row by row. Profiling and caching do not apply.
+
+        Args:
+            arr (pyarrow.Array or pyarrow.ChunkedArray): Strings to clean. Nulls are kept.
+
+        Returns:
+            pyarrow.Array or pyarrow.ChunkedArray: cleaned strings, of the same type as arr.
+        """
+        from texttidy.arrow import run_pipeline
+        with backend.use_backend(self.regex_backend):
+            return run_pipeline(self, arr)
+
+
+    def run_chunked(self, text, chunk_size=1 << 20):
+        """Clean a very large string in chunks of about chunk_size characters, with the same output as cleaning it whole.
+
+        Peak memory depends on the chunk size rather than the size of the text, see segment.clean_chunked.
+
+        Args:
+            text (str): text to clean.
+            chunk_size (int, optional): Minimum chunk size in characters. Defaults to 1048576.
+
+        Returns:
+            str: cleaned text.
+        """
+        from texttidy.segment import clean_chunked
+        return clean_chunked(self, text, chunk_size)
+
+
+    async def arun(self, text, executor=None):
+        """Clean a string in an executor without blocking the event loop.
+
+        Args:
+            text (str): text to clean.
+            executor (Executor, optional): Thread or process pool. Defaults to None (the event loop's default executor).
+
+        Returns:
+            str: cleaned text.
+        """
+        from texttidy.aio import _submit
+        results = await _submit(self, [text], executor)
+        return results[0]
+
+
+    def atransform(self, texts, executor=None, batch_size=64, max_concurrency=4):
+        """Clean an iterable or async iterable of strings in an executor, for use with "async for".
+
+        Texts are sent to the executor in batches of batch_size, with at most max_concurrency batches in flight.
+
+        Returns:
+            async generator: cleaned texts, in input order.
+        """
+        from texttidy.aio import atransform
+        return atransform(self, texts, executor=executor, batch_size=batch_size, max_concurrency=max_concurrency)
 
 
     def _run_func(self, t, func, *args, **kwargs):
@@ -56,9 +417,18 @@ class Pipeline:
         if t is None:
             raise ValueError("Please add text to 'self.text_input' before running pipe.")
 
+        if self.profile is not None or self.cache is not None or self.dedup:
+            self.text_output = self(t)
+            return
+
         funcs = zip(self._steps, self._kwargs)
 
-        for step, kwarg in tqdm(funcs, disable=not self._verbose):
-            t = self._run_func(t, step, **kwarg)
+        if self._verbose:
+            from tqdm import tqdm
+            funcs = tqdm(funcs, total=len(self._steps))
+
+        with backend.use_backend(self.regex_backend):
+            for step, kwarg in funcs:
+                t = self._run_func(t, step, **kwarg)
 
         self.text_output = t
@@ -0,0 +1,103 @@
+""" Per-step profiling of pipeline runs """
+
+import threading
+
+
+FIELDS = ['index', 'step', 'time', 'calls', 'time_per_call', 'chars_in', 'chars_out', 'changed', 'changed_ratio', 'skipped', 'skipped_ratio']
+
+
+class PipelineProfile:
+    """Accumulates wall time, call count, input/output characters, the number of changed texts and the number of texts skipped by the step's pre-check for each step of a pipeline.
+
+    Counters are updated once per cleaned text, under a lock, so a profile can be shared between threads.
+    """
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self._lock = threading.Lock()
+        self.reset()
+
+
+    def reset(self):
+        """ Clear all counters. """
+        with self._lock:
+            # [time, calls, chars_in, chars_out, changed, skipped] for each step
+            self._stats = [[0.0, 0, 0, 0, 0, 0] for _ in self.steps]
+
+
+    def record(self, stats):
+        """ Add the counters of one run, given as a list of [time, calls, chars_in, chars_out, changed, skipped] per step. """
+        with self._lock:
+            for total, s in zip(self._stats, stats):
+                for i, v in enumerate(s):
+                    total[i] += v
+
+
+    def report(self, sort_by='time', descending=True):
+        """Per-step report.
+
+        Args:
+            sort_by (str or None, optional): Field to sort by (see FIELDS). If None, steps are given in pipeline order. Defaults to 'time'.
+            descending (bool, optional): Sort in descending order. Defaults to True.
+
+        Returns:
+            list: one dictionary per step.
+        """
+        with self._lock:
+            stats = [list(s) for s in self._stats]
+
+        rows = []
+        for i, (step, (time, calls, chars_in, chars_out, changed, skipped)) in enumerate(zip(self.steps, stats)):
+            rows.append({
+                'index': i,
+                'step': step,
+                'time': time,
+                'calls': calls,
+                'time_per_call': time / calls if calls else 0.0,
+                'chars_in': chars_in,
+                'chars_out': chars_out,
+                'changed': changed,
+                'changed_ratio': changed / calls if calls else 0.0,
+                'skipped': skipped,
+                'skipped_ratio': skipped / calls if calls else 0.0,
+            })
+
+        if sort_by is not None:
+            if sort_by not in FIELDS:
+                raise ValueError(f"Cannot sort by '{sort_by}', expecting one of {FIELDS}.")
+            rows.sort(key=lambda r: r[sort_by], reverse=descending)
+        return rows
+
+
+    def to_dataframe(self, sort_by='time', descending=True):
+        """ Per-step report as a pandas DataFrame. Requires pandas. """
+        import pandas as pd
+        return pd.DataFrame(self.report(sort_by, descending), columns=FIELDS).set_index('index')
+
+
+    def to_table(self, sort_by='time', descending=True):
+        """ Per-step report as a plain text table. """
+        rows = self.report(sort_by, descending)
+        header = ['#', 'step', 'time (s)', 'calls', 'per call (us)', 'chars in', 'chars out', 'changed', 'changed %', 'skipped %']
+        lines = [[
+            str(r['index']),
+            r['step'],
+            f"{r['time']:.4f}",
+            str(r['calls']),
+            f"{r['time_per_call'] * 1e6:.1f}",
+            str(r['chars_in']),
+            str(r['chars_out']),
+            str(r['changed']),
+            f"{r['changed_ratio'] * 100:.1f}",
+            f"{r['skipped_ratio'] * 100:.1f}",
+        ] for r in rows]
+
+        widths = [max(len(row[i]) for row in [header] + lines) for i in range(len(header))]
+
+        def fmt(row):
+            return "  ".join(c.ljust(w) if i == 1 else c.rjust(w) for i, (c, w) in enumerate(zip(row, widths)))
+
+        return "\n".join([fmt(header), fmt(['-' * w for w in widths])] + [fmt(row) for row in lines])
+
+
+    def __str__(self):
+        return self.to_table()
@@ -0,0 +1,85 @@
+""" Registry of the functions that can be used as pipeline steps """
+
+from functools import lru_cache
+
+
+# Step name -> function
+STEPS = {}
+
+# Step name -> metadata dictionary
+STEP_META = {}
+
+
+def register_step(func=None, *, name=None, replace=False, **meta):
+    """Register a function as a pipeline step. Can be used as a decorator, with or without arguments.
+
+    The function is called as func(text, **kwargs) for each step that names it, so custom steps should
+    take a single string as the first argument and return a string.
+
+    Args:
+        func (callable): Step function.
+        name (str, optional): Step name used in pipeline definitions. Defaults to the function name.
+        replace (bool, optional): Allow replacing a step already registered under the same name. Defaults to False.
+        **meta: Properties of the step used when planning pipelines. By default a step is assumed to only change text within a sentence:
+            scope (str): "paragraph" for steps that look across sentence stops (e.g. multi-word tokens), "document" for steps that look across paragraph breaks (e.g. rewriting newlines).
+            edge (str): "start", "end" or "both" for steps that only change the start and/or end of the text.
+            edge_kwargs (dict): kwargs that restrict an edge step to one edge, keyed by "start" and "end".
+            edge_defaults (tuple): kwargs that edge_kwargs rely on being left at their defaults. With other values the step looks at the whole document.
+            strips (bool): the edge step also strips whitespace from both ends of the text.
+            collapses_whitespace (bool): the step replaces every run of two or more whitespace characters with a single space.
+            precheck (callable): takes the same arguments as the step and returns False only when the step would return the text unchanged.
+            prepare (callable): takes the step's kwargs and returns the kwargs to bind when the pipeline is compiled, e.g. to build a lookup structure once rather than on every call.
+        The properties below are used by Pipeline.optimize to drop redundant steps. They are declared for the step's default kwargs, and not relied on for steps with other kwargs:
+            idempotent (bool): running the step again does not change its output.
+            implies (tuple): names of steps that cannot change the output of this step, e.g. because it finishes by calling them.
+            preserves (tuple): names of steps that this step never undoes: text that such a step leaves unchanged is still left unchanged by it after this step.
+            commutes (tuple): names of steps that give the same output when run before or after this step. Implies preserves, in both directions.
+
+    Returns:
+        callable: the function, unchanged.
+    """
+    def decorator(f):
+        step = name or f.__name__
+        if not replace and STEPS.get(step, f) is not f:
+            raise ValueError(f"A step named '{step}' is already registered.")
+        STEPS[step] = f
+        STEP_META[step] = meta
+        return f
+
+    if func is None:
+        return decorator
+    return decorator(func)
+
+
+def get_step(name):
+    """ Function registered under name. """
+    try:
+        return STEPS[name]
+    except (KeyError, TypeError):
+        raise TypeError(f"'{name}' not recognised in function list.") from None
+
+
+def get_step_meta(name):
+    """ Metadata registered with the step, see register_step. """
+    return STEP_META.get(name, {})
+
+
+def list_steps():
+    """ Names of all registered steps. """
+    return sorted(STEPS)
+
+
+@lru_cache(maxsize=None)
+def default_kwargs(func):
+    """ Parameters of func that have a default value, with their defaults. Read from the signature once per function; do not modify the result. """
+    import inspect
+
+    return {
+        p.name: p.default for p in inspect.signature(func).parameters.values()
+        if p.default is not p.empty
+    }
+
+
+def normalised_kwargs(func, kwargs):
+    """ kwargs merged with the defaults of func. """
+    return {**default_kwargs(func), **kwargs}
@@ -0,0 +1,340 @@
+""" Cleaning documents segment by segment: incrementally for edited documents, and in bounded-size chunks for very large strings """
+
+import re
+from functools import partial
+
+from texttidy.cache import PipelineCache
+from texttidy.functions import _unvectorized
+from texttidy.pipe import BackendPipeline, CompiledPipeline, Pipeline
+from texttidy.registry import default_kwargs, get_step_meta
+
+
+# Whitespace containing a blank line, or whitespace after a sentence stop. Paragraph break
+# matches only start at the beginning of a whitespace run, so runs without a blank line are
+# scanned once.
+_RX_PARAGRAPH = re.compile(r"(?<![^\S\n])[^\S\n]*\n[^\S\n]*\n\s*")
+_RX_BREAK = re.compile(_RX_PARAGRAPH.pattern + r"|(?<=[A-Za-z0-9]{2}[.!?])\s+")
+
+# A break is only used when the text either side of it cannot interact through any step,
+# e.g. a paragraph starting with "." or "-" stays attached to the one before it
+_ALNUM = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+_SAFE_END = frozenset(_ALNUM + ".!?)\"'")
+_SAFE_START = frozenset(_ALNUM)
+_LETTERS = frozenset(_ALNUM[:52])
+
+# Document edge touched by each segment role
+_ROLE_EDGES = {"first": "start", "middle": None, "last": "end"}
+
+# Whitespace stripping of edge steps that are skipped for a segment, see register_step
+_EDGE_STRIP = {"start": str.lstrip, "end": str.rstrip}
+
+
+def _starts_safely(text):
+    """ True if a break can come before text. Not before a single letter and a full stop, so that "e. g." is not split once whitespace is collapsed. """
+    return text[:1] in _SAFE_START and not (text[1:2] == '.' and text[:1] in _LETTERS)
+
+
+def _is_break(text, start, end, sentences, collapse):
+    if start == 0 or end == len(text) or not _starts_safely(text[end:end + 2]):
+        return False
+    sep = text[start:end]
+    if sep.count('\n') > 1:
+        return text[start - 1] in _SAFE_END
+    # Sentence breaks come after two letters or digits and a stop, so that "e. g." is not split
+    # A single newline or tab is only collapsed if it touches other whitespace, so is not split either
+    return sentences and (not collapse or sep == ' ' or len(sep) > 1)
+
+
+def split_segments(text, sentences=False, collapse=True):
+    """Split text into paragraphs at blank lines, or into sentences.
+
+    Leading and trailing whitespace stays with the first and last segment. Breaks next to
+    punctuation that a step could join across are not split.
+
+    Args:
+        text (str): document.
+        sentences (bool, optional): Also split after sentence stops. Defaults to False.
+        collapse (bool, optional): The pipeline collapses whitespace, see SegmentPlan. Defaults to True.
+
+    Returns:
+        tuple: (segments, separators), where text == segments[0] + separators[0] + segments[1] + ... + segments[-1].
+    """
+    segments = []
+    separators = []
+    pos = 0
+    rx = _RX_BREAK if sentences else _RX_PARAGRAPH
+    for m in rx.finditer(text):
+        start, end = m.span()
+        if _is_break(text, start, end, sentences, collapse):
+            segments.append(text[pos:start])
+            separators.append(text[start:end])
+            pos = end
+    segments.append(text[pos:])
+    return segments, separators
+
+
+def iter_chunks(text, chunk_size, sentences=False, collapse=True):
+    """Split text into chunks of at least chunk_size characters, at the first break after each chunk_size.
+
+    Yields:
+        tuple: (chunk, separator), the separator is None for the last chunk.
+    """
+    rx = _RX_BREAK if sentences else _RX_PARAGRAPH
+    pos = 0
+    while len(text) - pos > chunk_size:
+        for m in rx.finditer(text, pos + chunk_size):
+            start, end = m.span()
+            if _is_break(text, start, end, sentences, collapse):
+                yield text[pos:start], text[start:end]
+                pos = end
+                break
+        else:
+            break
+    yield text[pos:], None
+
+
+class _BreakMoved(Exception):
+    """ A step changed the text next to a break, so the segments may no longer be cleaned separately. """
+
+
+class SegmentPipeline(CompiledPipeline):
+    """Execution plan for a segment that is not the whole document.
+
+    Steps can delete or insert text at the edge of a segment, e.g. remove_pronouns on a paragraph
+    that ends in "he". The text either side of each break is checked after every step, and
+    _BreakMoved is raised if a step left anything a break is not allowed next to, so that the
+    document is cleaned whole instead.
+    """
+    def __init__(self, plan, start=True, end=True):
+        super().__init__(plan)
+        self._start = start
+        self._end = end
+
+
+    def __call__(self, text):
+        for func in self._funcs:
+            text = func(text)
+            if (self._start and not _starts_safely(text)) or (self._end and text[-1:] not in _SAFE_END):
+                raise _BreakMoved
+        return text
+
+
+class SegmentPlan:
+    """Execution plans for cleaning a document one segment at a time, with the same output as cleaning it whole.
+
+    - Steps that only change the start or end of the text (e.g. add_fullstop, strip_stopwords) are
+      only applied to the first or last segment.
+    - If the pipeline collapses whitespace (e.g. single_space), segments are joined with a single
+      space, otherwise with the original separators.
+    - Steps that look across sentences (e.g. replace_tokens) limit segments to paragraphs, and steps
+      that look across paragraphs (e.g. remove_escapes) to the whole document. So do steps that look
+      across sentences after whitespace is collapsed, as paragraph breaks are single spaces by then.
+    - The text next to each break is checked after every step (see SegmentPipeline), and the
+      document is cleaned whole if a step changed it.
+
+    See register_step for the step metadata this relies on.
+
+    Args:
+        pipe (dict or Pipeline): Pipeline definition (e.g. texttidy.FULLMONTY) or pipeline.
+    """
+    def __init__(self, pipe):
+        if not isinstance(pipe, Pipeline):
+            pipe = Pipeline(pipe=pipe)
+        self.pipeline = pipe
+
+        metas = [get_step_meta(step) for step in pipe.steps]
+        scopes = set()
+        collapsed = False
+        for meta, func, kwargs in zip(metas, pipe._steps, pipe._kwargs):
+            scope = self._scope(meta, func, kwargs)
+            if scope == 'paragraph' and collapsed:
+                # Paragraph breaks are single spaces by then, e.g. single_space before replace_tokens
+                scope = 'document'
+            scopes.add(scope)
+            collapsed = collapsed or bool(meta.get('collapses_whitespace'))
+        if 'document' in scopes:
+            self.scope = 'document'
+        elif 'paragraph' in scopes:
+            self.scope = 'paragraph'
+        else:
+            self.scope = 'sentence'
+        self.collapse = any(meta.get('collapses_whitespace') for meta in metas)
+        self.edges = {meta.get('edge') for meta in metas} - {None}
+
+        self.plans = {"only": pipe._compiled}
+        for role in _ROLE_EDGES:
+            self.plans[role] = self._role_plan(pipe, role)
+
+
+    @staticmethod
+    def _scope(meta, func, kwargs):
+        if meta.get('edge') == 'both':
+            if 'edge_kwargs' not in meta:
+                return 'document'
+            # edge_kwargs only restrict the step to one edge with these kwargs left at their defaults
+            defaults = default_kwargs(func)
+            if any(k in kwargs and kwargs[k] != defaults[k] for k in meta.get('edge_defaults', ())):
+                return 'document'
+        return meta.get('scope', 'sentence')
+
+
+    @staticmethod
+    def _role_plan(pipe, role):
+        """ Plan for a segment that is not the whole document. """
+        side = _ROLE_EDGES[role]
+        plan = []
+        for step, func, kwargs in pipe._fuse_steps():
+            meta = get_step_meta(step)
+            edge = meta.get('edge')
+            if edge is not None:
+                if side is None or edge not in (side, 'both'):
+                    # The step still strips this segment's edge of the document
+                    if side is not None and meta.get('strips'):
+                        plan.append((step, _EDGE_STRIP[side]))
+                    continue
+                if edge == 'both':
+                    kwargs = {**kwargs, **meta['edge_kwargs'][side]}
+
+            func = _unvectorized(func)
+            if kwargs:
+                func = partial(func, **kwargs)
+            plan.append((step, func))
+        compiled = SegmentPipeline(plan, start=side != "start", end=side != "end")
+        if pipe.regex_backend is not None:
+            compiled = BackendPipeline(compiled, pipe.regex_backend)
+        return compiled
+
+
+    def roles(self, n):
+        """ Role of each of n segments. """
+        if n == 1:
+            return ["only"]
+        return ["first"] + ["middle"] * (n - 2) + ["last"]
+
+
+    def valid(self, out):
+        """ False if an edge step removed a whole edge segment, in which case it would have continued into the next. """
+        return not self.edges or bool(out[0] and out[-1])
+
+
+    def join(self, out, separators):
+        """ Join cleaned segments. """
+        if self.collapse:
+            return " ".join(s for s in out if s)
+        parts = [out[0]]
+        for sep, s in zip(separators, out[1:]):
+            parts.append(sep)
+            parts.append(s)
+        return "".join(parts)
+
+
+class IncrementalCleaner:
+    """Clean long documents paragraph by paragraph, reusing the output of paragraphs seen before.
+
+    Documents are split at blank lines and each paragraph is cleaned separately, with results
+    cached by paragraph content. When one paragraph of a document is edited, only that paragraph
+    is cleaned again. The output is the same as cleaning the whole document, see SegmentPlan.
+
+    Args:
+        pipe (dict or Pipeline): Pipeline definition (e.g. texttidy.FULLMONTY) or pipeline.
+        cache (PipelineCache, optional): Cache for cleaned paragraphs. Defaults to None (a new in-memory PipelineCache).
+    """
+    def __init__(self, pipe, cache=None):
+        self.plan = SegmentPlan(pipe)
+        self.pipeline = self.plan.pipeline
+        self.cache = PipelineCache() if cache is None else cache
+        self.segmented = self.plan.scope != 'document'
+        self.reset_stats()
+
+
+    def reset_stats(self):
+        self.documents = 0
+        self.segments = 0
+        self.cleaned = 0
+        self.fallbacks = 0
+
+
+    @property
+    def stats(self):
+        """ Number of documents, paragraphs, paragraphs that had to be cleaned and whole-document fallbacks. """
+        return {
+            'documents': self.documents,
+            'segments': self.segments,
+            'cleaned': self.cleaned,
+            'reused': self.segments - self.cleaned,
+            'fallbacks': self.fallbacks,
+        }
+
+
+    def _clean(self, text, role):
+        key = self.cache.key(f"{self.pipeline.fingerprint}/{role}", text)
+        out = self.cache.get(key)
+        if out is None:
+            out = self.plan.plans[role](text)
+            self.cache.set(key, out)
+            self.cleaned += 1
+        self.segments += 1
+        return out
+
+
+    def __call__(self, text):
+        """ Clean a document. """
+        self.documents += 1
+        if not self.segmented:
+            return self._clean(text, "only")
+
+        segments, separators = split_segments(text, collapse=self.plan.collapse)
+        if len(segments) == 1:
+            return self._clean(text, "only")
+
+        try:
+            out = [self._clean(s, role) for s, role in zip(segments, self.plan.roles(len(segments)))]
+        except (IndexError, _BreakMoved):
+            # e.g. add_fullstop on a paragraph that is empty once cleaned, or a step that removed
+            # the word next to a break
+            out = None
+
+        if out is None or not self.plan.valid(out):
+            self.fallbacks += 1
+            return self._clean(text, "only")
+        return self.plan.join(out, separators)
+
+
+def clean_chunked(pipe, text, chunk_size=1 << 20):
+    """Clean a very large string in chunks, so that working memory depends on the chunk size rather than the text size.
+
+    The text is split at the first paragraph or sentence break after every chunk_size characters,
+    each chunk is run through the pipeline and the output is stitched back together. The output is
+    the same as cleaning the whole string, see SegmentPlan: if a step changes the text next to a
+    break, the whole string is cleaned at once.
+
+    Args:
+        pipe (dict, Pipeline or SegmentPlan): Pipeline definition (e.g. texttidy.FULLMONTY), pipeline or segment plan.
+        text (str): text to clean.
+        chunk_size (int, optional): Minimum chunk size in characters. Defaults to 1048576.
+
+    Returns:
+        str: cleaned text.
+    """
+    plan = pipe if isinstance(pipe, SegmentPlan) else SegmentPlan(pipe)
+    if plan.scope == 'document' or len(text) <= chunk_size:
+        return plan.plans["only"](text)
+
+    out = []
+    separators = []
+    role = "first"
+    for chunk, sep in iter_chunks(text, chunk_size, plan.scope == 'sentence', plan.collapse):
+        if sep is None:
+            role = "last" if out else "only"
+        try:
+            out.append(plan.plans[role](chunk))
+        except (IndexError, _BreakMoved):
+            # e.g. add_fullstop on a chunk that is empty once cleaned, or a step that removed the
+            # word next to a break
+            return plan.plans["only"](text)
+        separators.append(sep)
+        role = "middle"
+
+    if not plan.valid(out):
+        return plan.plans["only"](text)
+    return plan.join(out, separators)
@@ -0,0 +1,114 @@
+""" Single pass replacement of many tokens """
+
+import hashlib
+import re
+
+from texttidy import backend
+
+
+def _trie_pattern(node):
+    """ Regex matching every word in a trie, sharing common prefixes. """
+    end = '' in node
+    branches = [(c, child) for c, child in sorted(node.items()) if c != '']
+    if not branches:
+        return ''
+
+    alternatives = [re.escape(c) + _trie_pattern(child) for c, child in branches]
+    chars = [a for a in alternatives if len(a) == 1 or (len(a) == 2 and a[0] == '\\')]
+    if len(chars) > 1:
+        # Single characters are combined into a class
+        alternatives = [a for a in alternatives if a not in chars] + [f"[{''.join(chars)}]"]
+
+    if len(alternatives) == 1 and not end:
+        return alternatives[0]
+
+    pattern = f"(?:{'|'.join(alternatives)})"
+    if end:
+        pattern += '?'
+    return pattern
+
+
+class TokenReplacer:
+    """Replace tokens as specified in a dictionary {k: [v1, v2, v]} where tokens v in the text are replaced by token k.
+
+    The dictionary is compiled once into a prefix trie pattern so that all replacements are made in a
+    single pass over the text. Tokens are matched case-insensitively, on word boundaries and not next
+    to a hyphen. Where synonyms overlap, the longest match wins.
+
+    Args:
+        values (dict): {replacement: [token, ...]}.
+    """
+    def __init__(self, values):
+        self.values = values
+        self._digest = None
+        self._lookup = {}
+        self._casefold = {}
+
+        trie = {}
+        for k, v in values.items():
+            for token in v:
+                if not token:
+                    continue
+                lower = token.lower()
+                # Earlier entries win, as they did when each token was a separate pass
+                self._lookup.setdefault(lower, k)
+                self._casefold.setdefault(token.casefold(), k)
+
+                # Characters that lower to more than one character (e.g. "İ") are kept as they are,
+                # so that the pattern still matches the token itself. IGNORECASE handles their case
+                node = trie
+                for c in token:
+                    c_lower = c.lower()
+                    node = node.setdefault(c_lower if len(c_lower) == 1 else c, {})
+                node[''] = True
+
+        self.rx = None
+        self._module = backend.module()
+        self._token_patterns = None
+        if trie:
+            # Compiled with the regex backend in use, see texttidy.backend
+            self.rx = self._module.compile(rf"(?<!-)\b{_trie_pattern(trie)}\b(?!-)", re.IGNORECASE)
+
+
+    @property
+    def digest(self):
+        """ Hash of the replacements, used in pipeline fingerprints. Entry order is kept as earlier entries win. """
+        if self._digest is None:
+            from texttidy.cache import canonical_json
+            definition = canonical_json([[k, v] for k, v in self.values.items()])
+            self._digest = hashlib.sha256(definition.encode('utf-8')).hexdigest()
+        return self._digest
+
+
+    def _replace(self, match):
+        token = match.group()
+        k = self._lookup.get(token.lower())
+        if k is None:
+            # re.IGNORECASE also matches some characters that only agree after case folding
+            k = self._casefold.get(token.casefold())
+        if k is None:
+            k = self._match_token(token)
+        return k
+
+
+    def _match_token(self, token):
+        """ Replacement of a token that IGNORECASE matched but lowering and case folding do not, e.g. "istanbul" for "İstanbul". """
+        if self._token_patterns is None:
+            self._token_patterns = [
+                (self._module.compile(re.escape(t), re.IGNORECASE), k)
+                for k, v in self.values.items() for t in v if t
+            ]
+        for rx, k in self._token_patterns:
+            if rx.fullmatch(token):
+                return k
+        return token
+
+
+    def __call__(self, text):
+        if self.rx is None:
+            return text
+        return self.rx.sub(self._replace, text)
+
+
+    def __len__(self):
+        return len(self._lookup)
@@ -1,9 +1,8 @@
 """ pkg utility functions """
 
-import inspect
 import json
 
-import texttidy
+from texttidy.registry import get_step
 
 
 def generate_pipeline_file(steps, write_to_json=None):
@@ -17,15 +16,11 @@ def generate_pipeline_file(steps, write_to_json=None):
         dict: Pipeline as a dictionary.
     """
 
-    eval_steps = []
-    for step in steps:
-        try:
-            eval_steps.append(eval(f"texttidy.{step}"))
-        except:
-            raise TypeError(f"'{step}' not recognised in function list.")
+    import inspect
 
     output = {}
-    for i, f in enumerate(eval_steps):
+    for i, step in enumerate(steps):
+        f = get_step(step)
         sig = inspect.signature(f)
 
         kwargs = {}
@@ -36,7 +31,7 @@ def generate_pipeline_file(steps, write_to_json=None):
                 kwargs[arg] = val
 
         output[str(i)] = {
-            "step": f.__name__,
+            "step": step,
             "kwargs": kwargs
         }
 